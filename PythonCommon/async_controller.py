@@ -0,0 +1,179 @@
+import asyncio
+import time
+from dataclasses import dataclass
+from threading import Lock
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+RESULT_EVENTS = {'connectionStateChanged': 'state',
+                 'batteryChanged': 'battery',
+                 'signalGap': 'gap',
+                 'signalQualityUpdated': 'quality',
+                 'hrValuesUpdated': 'hr',
+                 'hasRRPicks': 'rr',
+                 'resistValuesUpdated': 'resist',
+                 'isArtefacted': 'artefacted',
+                 'calibrationProcessChanged': 'calibration',
+                 'calibrationFinished': 'calibrated',
+                 'mindDataUpdated': 'mind_data'}
+
+# batch delivery replaces the per-result events, each batch is split into one event per address
+BATCH_EVENTS = {'hrValuesBatch': 'hr_batch',
+                'mindDataBatch': 'mind_batch'}
+
+# results are stamped with the time of the sample they were computed from, other events with arrival time
+STAMPED_EVENTS = {'hr', 'rr', 'mind_data'}
+
+
+@dataclass
+class ControllerEvent:
+    time: float
+    address: str
+    event: str
+    value: Any
+
+
+class ResultStream:
+    def __init__(self, owner, addresses: Optional[List[str]], events: Optional[List[str]], max_events: int):
+        self.addresses = set(addresses) if addresses is not None else None
+        self.events = set(events) if events is not None else None
+        self.dropped = 0
+        self.__owner = owner
+        self.__queue = asyncio.Queue(max_events)
+        self.__closed = False
+
+    def accepts(self, event: ControllerEvent) -> bool:
+        return (self.addresses is None or event.address in self.addresses) and \
+            (self.events is None or event.event in self.events)
+
+    def put(self, event: ControllerEvent):
+        if self.__queue.full():
+            self.__queue.get_nowait()
+            self.dropped += 1
+        self.__queue.put_nowait(event)
+
+    def close(self):
+        if not self.__closed:
+            self.__closed = True
+            self.__owner.unsubscribe(self)
+            if self.__queue.full():
+                self.__queue.get_nowait()
+            self.__queue.put_nowait(None)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> ControllerEvent:
+        if self.__closed and self.__queue.empty():
+            raise StopAsyncIteration
+        event = await self.__queue.get()
+        if event is None:
+            raise StopAsyncIteration
+        return event
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        self.close()
+
+
+class AsyncController:
+    def __init__(self, controller, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.controller = controller
+        self.__loop = loop or asyncio.get_running_loop()
+        self.__streams: List[ResultStream] = []
+        self.__pending = []
+        self.__scheduled = False
+        self.__lock = Lock()
+        self.__callbacks: Dict[str, Any] = {}
+        for events, make_callback in ((RESULT_EVENTS, self.__callback), (BATCH_EVENTS, self.__batch_callback)):
+            for attribute, event in events.items():
+                if hasattr(controller, attribute):
+                    previous = getattr(controller, attribute)
+                    callback = make_callback(event, previous)
+                    self.__callbacks[attribute] = (callback, previous)
+                    setattr(controller, attribute, callback)
+
+    # callbacks assigned before the facade was created keep being called
+    def __callback(self, event: str, previous):
+        stamped = event in STAMPED_EVENTS
+
+        def callback(address: str, value):
+            stamp = self.controller.result_time(address) if stamped else None
+            self.__publish(ControllerEvent(stamp[1] if stamp is not None else time.time(), address, event, value))
+            if previous is not None:
+                previous(address, value)
+
+        return callback
+
+    def __batch_callback(self, event: str, previous):
+        def callback(records: np.ndarray):
+            addresses = records['address']
+            for address in np.unique(addresses).tolist():
+                rows = records[addresses == address]
+                self.__publish(ControllerEvent(float(rows['timestamp'][-1]), address, event, rows))
+            if previous is not None:
+                previous(records)
+
+        return callback
+
+    def __publish(self, event: ControllerEvent):
+        with self.__lock:
+            self.__pending.append(event)
+            if self.__scheduled:
+                return
+            self.__scheduled = True
+        try:
+            self.__loop.call_soon_threadsafe(self.__flush)
+        except RuntimeError:
+            pass
+
+    def __flush(self):
+        with self.__lock:
+            pending, self.__pending = self.__pending, []
+            self.__scheduled = False
+        for stream in self.__streams:
+            for event in pending:
+                if stream.accepts(event):
+                    stream.put(event)
+
+    def subscribe(self, addresses: Optional[List[str]] = None, events: Optional[List[str]] = None,
+                  max_events: int = 1024) -> ResultStream:
+        stream = ResultStream(self, addresses, events, max_events)
+        self.__streams.append(stream)
+        return stream
+
+    def unsubscribe(self, stream: ResultStream):
+        if stream in self.__streams:
+            self.__streams.remove(stream)
+
+    async def search(self, seconds: float, addresses: List[str] = [], use_cache: bool = True) -> list:
+        return await asyncio.to_thread(lambda: list(self.controller.discover(seconds, addresses, use_cache)))
+
+    async def connect(self, info, need_reconnect: bool = False, **kwargs):
+        report = await self.connect_many([info], need_reconnect, max_parallel=1, **kwargs)
+        return report.devices[0]
+
+    async def connect_many(self, infos: list, need_reconnect: bool = False, **kwargs):
+        return await asyncio.wrap_future(self.controller.connect_many(infos, need_reconnect, **kwargs))
+
+    async def disconnect(self, address: str):
+        await asyncio.to_thread(self.controller.disconnect_from, address)
+
+    async def start_calculations(self, address: str, use_worker: bool = False, **kwargs):
+        future = await asyncio.to_thread(self.controller.start_calculations, address, use_worker, **kwargs)
+        if future is not None:
+            return await asyncio.wrap_future(future)
+
+    async def stop_calculations(self, address: str):
+        await asyncio.to_thread(self.controller.stop_calculations, address)
+
+    def close(self):
+        for attribute, (callback, previous) in self.__callbacks.items():
+            if getattr(self.controller, attribute, None) is callback:
+                setattr(self.controller, attribute, previous)
+        self.__callbacks.clear()
+        for stream in list(self.__streams):
+            stream.close()
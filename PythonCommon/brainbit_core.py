@@ -0,0 +1,330 @@
+import time
+from dataclasses import dataclass
+from enum import Enum
+from itertools import chain
+from operator import attrgetter
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from em_st_artifacts.emotional_math import EmotionalMath
+from em_st_artifacts.utils.lib_settings import MathLibSetting, ArtifactDetectSetting, ShortArtifactDetectSetting, \
+    MentalAndSpectralSetting
+from em_st_artifacts.utils.support_classes import RawChannels
+from neurosdk.brainbit_sensor import BrainBitSensor
+from neurosdk.cmn_types import SensorInfo, SensorFamily, SensorCommand, BrainBitSignalData
+from neurosdk.scanner import Scanner
+
+from calibration_cache import CalibrationCache
+from resist_monitor import ResistMonitor
+from sensor_core import SensorController, SensorDevice, BatchScheduler
+
+
+@dataclass
+class MindDataReal:
+    __slots__ = ('attention', 'relaxation', 'sample_index', 'timestamp')
+    attention: float
+    relaxation: float
+    sample_index: int
+    timestamp: float
+
+
+class ResistState(Enum):
+    Normal=0
+    Bad=1
+
+
+@dataclass
+class ResistValues:
+    __slots__ = ('O1', 'O2', 'T3', 'T4')
+    O1: ResistState
+    O2: ResistState
+    T3: ResistState
+    T4: ResistState
+
+
+@dataclass
+class BrainBitInfo:
+    __slots__ = ('Name', 'Address', 'sensor_info')
+    Name: str
+    Address: str
+    sensor_info: SensorInfo
+
+
+SIGNAL_CHANNELS = attrgetter('O1', 'O2', 'T3', 'T4')
+PACK_NUM = attrgetter('PackNum')
+
+
+def signal_to_array(data) -> np.ndarray:
+    return np.fromiter(chain.from_iterable(map(SIGNAL_CHANNELS, data)), dtype=np.float64,
+                       count=len(data) * 4).reshape(-1, 4)
+
+
+def signal_rows(data) -> Tuple[np.ndarray, np.ndarray]:
+    return np.fromiter(map(PACK_NUM, data), dtype=np.uint32, count=len(data)), signal_to_array(data)
+
+
+def signal_packets(rows: np.ndarray) -> List[BrainBitSignalData]:
+    return [BrainBitSignalData(PackNum=pack_num, Marker=0, O1=o1, O2=o2, T3=t3, T4=t4)
+            for pack_num, (o1, o2, t3, t4) in zip(rows['pack_num'].tolist(), rows['samples'].tolist())]
+
+
+def bipolar_channels(samples: np.ndarray) -> List[RawChannels]:
+    left_bipolar = samples[:, 2] - samples[:, 0]
+    right_bipolar = samples[:, 3] - samples[:, 1]
+    return list(map(RawChannels, left_bipolar.tolist(), right_bipolar.tolist()))
+
+
+class BrainBitAdditional(SensorDevice):
+    def __init__(self, need_reconnect: bool, sensor: BrainBitSensor):
+        super().__init__(need_reconnect, sensor, 250)
+        self.emotional_math: EmotionalMath = self.__create_emotional_math()
+        self.resist: Optional[ResistMonitor] = None
+        self.resist_values: Optional[ResistValues] = None
+        self.calibration_samples: Optional[List[np.ndarray]] = None
+        self.calibrating = False
+        self.calibration_progress = 0
+        self.calibration_started = 0.0
+
+    def reset_math(self):
+        self.emotional_math = self.__create_emotional_math()
+
+    def __create_emotional_math(self) -> EmotionalMath:
+        mls = MathLibSetting(sampling_rate=250,
+                             process_win_freq=25,
+                             fft_window=1000,
+                             n_first_sec_skipped=4,
+                             bipolar_mode=True,
+                             squared_spectrum=True,
+                             channels_number=4,
+                             channel_for_analysis=0)
+
+        ads = ArtifactDetectSetting(hanning_win_spectrum=True, num_wins_for_quality_avg=125)
+
+        sads = ShortArtifactDetectSetting(ampl_art_extremum_border=25)
+
+        mss = MentalAndSpectralSetting()
+        calibration_length = 6
+        nwins_skip_after_artifact = 5
+        return EmotionalMath(mls, ads, sads, mss)
+
+
+class BrainBitCore(SensorController):
+    FOUND_EVENT = 'founded'
+    CHANNELS = 4
+    CHANNEL_NAMES = ['O1', 'O2', 'T3', 'T4']
+    BATCH_EVENT = 'mindDataBatch'
+    BATCH_FIELDS = [('attention', '<f8'), ('relaxation', '<f8')]
+
+    def __init__(self, scanner=None, reconnect_workers: int = 8):
+        if scanner is None:
+            scanner = Scanner([SensorFamily.LEBrainBit])
+        super().__init__(scanner, reconnect_workers)
+        self.__scheduler: Optional[BatchScheduler] = None
+        self.__resist_settings = {'threshold': 2500000.0, 'hysteresis': 0.1, 'window': 5}
+        self.__calibration_cache: Optional[CalibrationCache] = None
+        self.__calibration_keys = {}
+
+    def _make_info(self, si: SensorInfo) -> BrainBitInfo:
+        return BrainBitInfo(Name=si.Name, Address=si.Address, sensor_info=si)
+
+    def _create_device(self, need_reconnect: bool, sensor: BrainBitSensor) -> BrainBitAdditional:
+        return BrainBitAdditional(need_reconnect, sensor)
+
+    def _packet_samples(self, data: List[BrainBitSignalData]) -> Tuple[np.ndarray, np.ndarray]:
+        return np.fromiter(map(PACK_NUM, data), dtype=np.int64, count=len(data)), signal_to_array(data)
+
+    def _signal_rows(self, data: List[BrainBitSignalData]) -> Tuple[np.ndarray, np.ndarray]:
+        return signal_rows(data)
+
+    def _signal_packets(self, rows: np.ndarray) -> List[BrainBitSignalData]:
+        return signal_packets(rows)
+
+    def set_resist_settings(self, threshold: float = 2500000.0, hysteresis: float = 0.1, window: int = 5):
+        self.__resist_settings = {'threshold': threshold, 'hysteresis': hysteresis, 'window': window}
+
+    def start_resist(self, address: str):
+        def on_resist_received(sensor, data):
+            try:
+                states = monitor.update(SIGNAL_CHANNELS(data))
+                if states is not None:
+                    device.resist_values = ResistValues(*[ResistState.Bad if bad else ResistState.Normal
+                                                          for bad in states])
+                    self._deliver('resistValuesUpdated', sensor.address, device.resist_values)
+            except Exception as err:
+                print(err)
+
+        try:
+            device = self._devices[address]
+            monitor = ResistMonitor(self.CHANNELS, **self.__resist_settings)
+            device.resist = monitor
+            device.resist_values = None
+            device.sensor.resistDataReceived = on_resist_received
+            self._execute_command(device.sensor, SensorCommand.StartResist)
+        except Exception as err:
+            print(err)
+
+    def start_resist_many(self, addresses: List[str]):
+        for address in addresses:
+            self.start_resist(address)
+
+    def stop_resist(self, address: str):
+        try:
+            self._devices[address].sensor.resistDataReceived = None
+            self._devices[address].resist = None
+            self._execute_command(self._devices[address].sensor, SensorCommand.StopResist)
+        except Exception as err:
+            print(err)
+
+    def stop_resist_many(self, addresses: List[str]):
+        for address in addresses:
+            self.stop_resist(address)
+
+    def resist_snapshot(self) -> Dict[str, Optional[ResistValues]]:
+        return {address: device.resist_values for address, device in self._devices.items()}
+
+    def resist_levels(self, address: str) -> Optional[dict]:
+        monitor = self._devices[address].resist
+        if monitor is None or monitor.levels is None:
+            return None
+        return dict(zip(self.CHANNEL_NAMES, monitor.levels.tolist()))
+
+    def start_calculations(self, address: str, use_worker: bool = False):
+        try:
+            return super().start_calculations(address, use_worker)
+        except Exception as err:
+            print(err)
+
+    def start_calculations_many(self, addresses: List[str], use_worker: bool = False):
+        return [self.start_calculations(address, use_worker) for address in addresses]
+
+    def _prepare_calculations(self, address: str, device: BrainBitAdditional):
+        self.__start_calibration(address, device)
+
+    def enable_calibration_cache(self, path: Optional[str] = None, expiry: float = 3600.0):
+        self.__calibration_cache = CalibrationCache(path, expiry)
+
+    def disable_calibration_cache(self):
+        self.__calibration_cache = None
+
+    def set_calibration_key(self, address: str, key: Optional[str]):
+        if key is None:
+            self.__calibration_keys.pop(address, None)
+        else:
+            self.__calibration_keys[address] = key
+
+    def forget_calibration(self, address: str):
+        if self.__calibration_cache is not None:
+            self.__calibration_cache.remove(self.__calibration_keys.get(address, address))
+
+    def calibration_status(self) -> Dict[str, int]:
+        return {address: device.calibration_progress for address, device in self._devices.items()
+                if device.calibrating}
+
+    def __start_calibration(self, address: str, device: BrainBitAdditional):
+        math = device.emotional_math
+        math.start_calibration()
+        device.calibrating = True
+        device.calibration_progress = 0
+        device.calibration_started = time.perf_counter()
+        device.calibration_samples = None
+        cache = self.__calibration_cache
+        if cache is None:
+            return
+        samples = cache.get(self.__calibration_keys.get(address, address))
+        if samples is not None:
+            # replay the stored calibration signal, a second per push keeps the library buffers small
+            for start in range(0, len(samples), device.sampling_rate):
+                math.push_data(bipolar_channels(samples[start:start + device.sampling_rate]))
+                math.process_data_arr()
+            if math.calibration_finished():
+                return
+            device.reset_math()
+            device.emotional_math.start_calibration()
+        device.calibration_samples = []
+
+    def _signal_receiver(self, address: str, use_worker: bool):
+        if self.__scheduler is not None:
+            scheduler = self.__scheduler
+            scheduler.register(address, self._signal_processor(address))
+            return lambda sensor, data: scheduler.put(address, sensor, data)
+        return super()._signal_receiver(address, use_worker)
+
+    def _process(self, address: str, device: BrainBitAdditional, samples: np.ndarray, started: float,
+                 arrived: float):
+        latency = self._latency
+        math = device.emotional_math
+
+        math.push_data(bipolar_channels(samples))
+        pushed = time.perf_counter()
+        math.process_data_arr()
+        processed = time.perf_counter()
+
+        self._deliver('isArtefacted', address, math.is_both_sides_artifacted())
+
+        if device.calibrating:
+            recorded = device.calibration_samples
+            if recorded is not None:
+                recorded.append(samples)
+            if math.calibration_finished():
+                device.calibrating = False
+                device.calibration_progress = 100
+                if recorded is not None:
+                    device.calibration_samples = None
+                    self.__save_calibration(address, recorded)
+                self._deliver('calibrationProcessChanged', address, 100)
+                self._deliver('calibrationFinished', address, time.perf_counter() - device.calibration_started)
+            else:
+                device.calibration_progress = math.get_calibration_percents()
+                self._deliver('calibrationProcessChanged', address, device.calibration_progress)
+        else:
+            mental_data = math.read_mental_data_arr()
+            if len(mental_data) > 0:
+                md = mental_data[-1]
+                sample_index, timestamp = self._stamp_result(device, device.timeline.sample_index)
+                batcher = self._batcher
+                if batcher is not None:
+                    batcher.append(address, sample_index, timestamp, md.rel_attention, md.rel_relaxation)
+                else:
+                    self._deliver('mindDataUpdated', address, MindDataReal(attention=md.rel_attention,
+                                                                           relaxation=md.rel_relaxation,
+                                                                           sample_index=sample_index,
+                                                                           timestamp=timestamp))
+        emitted = time.perf_counter()
+        latency.record(address, 'push', pushed - started)
+        latency.record(address, 'process', processed - pushed)
+        latency.record(address, 'emit', emitted - processed)
+        latency.record(address, 'total', emitted - arrived)
+
+    def _reset_device(self, address: str, device: BrainBitAdditional):
+        device.reset_math()
+        self.__start_calibration(address, device)
+
+    def __save_calibration(self, address: str, recorded: List[np.ndarray]):
+        cache = self.__calibration_cache
+        if cache is not None:
+            cache.put(self.__calibration_keys.get(address, address), np.concatenate(recorded))
+
+    def stop_calculations(self, address: str):
+        device = self._devices.get(address)
+        if device is not None:
+            device.calibrating = False
+            device.calibration_samples = None
+        super().stop_calculations(address)
+
+    def enable_batch_processing(self, workers: int = 4):
+        if self.__scheduler is None:
+            self.__scheduler = BatchScheduler(workers, latency=self._latency)
+
+    def scheduler_stats(self) -> Optional[dict]:
+        return self.__scheduler.stats() if self.__scheduler is not None else None
+
+    def _stop_pipeline(self, address: str):
+        super()._stop_pipeline(address)
+        if self.__scheduler is not None:
+            self.__scheduler.unregister(address)
+
+    def _shutdown(self):
+        if self.__scheduler is not None:
+            self.__scheduler.stop()
+            self.__scheduler = None
@@ -0,0 +1,75 @@
+import os
+import time
+from threading import Lock
+from typing import Optional
+
+import numpy as np
+
+
+class CalibrationCache:
+    def __init__(self, path: Optional[str] = None, expiry: float = 3600.0):
+        self.path = path
+        self.expiry = expiry
+        self.__entries = {}
+        self.__lock = Lock()
+        if path is not None:
+            os.makedirs(path, exist_ok=True)
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        with self.__lock:
+            entry = self.__entries.get(key)
+        if entry is None:
+            entry = self.__load(key)
+        if entry is None:
+            return None
+        saved, samples = entry
+        if time.time() - saved > self.expiry:
+            self.remove(key)
+            return None
+        return samples
+
+    def put(self, key: str, samples: np.ndarray):
+        entry = (time.time(), samples)
+        with self.__lock:
+            self.__entries[key] = entry
+        if self.path is not None:
+            try:
+                np.save(self.__file(key), samples)
+            except Exception as err:
+                print(err)
+
+    def remove(self, key: str):
+        with self.__lock:
+            self.__entries.pop(key, None)
+        if self.path is not None:
+            try:
+                os.remove(self.__file(key))
+            except FileNotFoundError:
+                pass
+
+    def clear(self):
+        with self.__lock:
+            self.__entries.clear()
+        if self.path is not None:
+            for name in os.listdir(self.path):
+                if name.endswith('.npy'):
+                    os.remove(os.path.join(self.path, name))
+
+    def __file(self, key: str) -> str:
+        name = ''.join(ch if ch.isalnum() else '_' for ch in key)
+        return os.path.join(self.path, name + '.npy')
+
+    def __load(self, key: str) -> Optional[tuple]:
+        if self.path is None:
+            return None
+        file = self.__file(key)
+        try:
+            entry = (os.path.getmtime(file), np.load(file))
+        except FileNotFoundError:
+            return None
+        except Exception as err:
+            print(err)
+            return None
+        with self.__lock:
+            self.__entries[key] = entry
+        return entry
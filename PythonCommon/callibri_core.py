@@ -0,0 +1,291 @@
+import os
+import time
+from dataclasses import dataclass
+from itertools import chain
+from threading import Lock
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from neurosdk.callibri_sensor import CallibriSensor
+from neurosdk.scanner import Scanner
+from neurosdk.cmn_types import SensorInfo, SensorFamily, SensorSamplingFrequency, SensorFilter, CallibriSignalType, \
+    CallibriSignalData
+from callibri_ecg.callibri_ecg_lib import CallibriMath
+
+from ecg_shards import ShardedEcgMath
+from sensor_core import SensorController, SensorDevice
+
+
+@dataclass
+class CallibriInfo:
+    __slots__ = ('Name', 'Address', 'sensor_info')
+    Name: str
+    Address: str
+    sensor_info: SensorInfo
+
+
+@dataclass(frozen=True)
+class EcgProfile:
+    sampling_rate: int = 1000
+    data_window: int = 500
+    nwins: int = 30
+    chunk_size: int = 100
+
+    @property
+    def sensor_frequency(self) -> SensorSamplingFrequency:
+        return getattr(SensorSamplingFrequency, 'FrequencyHz{}'.format(self.sampling_rate))
+
+
+ECG_PROFILES = {
+    'default': EcgProfile(),
+    'low_latency': EcgProfile(chunk_size=50),
+    'balanced': EcgProfile(sampling_rate=500, data_window=250, chunk_size=100),
+    'wellness': EcgProfile(sampling_rate=250, data_window=125, chunk_size=250),
+}
+DEFAULT_PROFILE = ECG_PROFILES['default']
+
+
+def signal_rows(data) -> Tuple[np.ndarray, np.ndarray]:
+    counts = [len(sample.Samples) for sample in data]
+    pack_nums = np.fromiter((sample.PackNum for sample in data), dtype=np.uint32, count=len(data))
+    return np.repeat(pack_nums, counts), np.fromiter(chain.from_iterable(sample.Samples for sample in data),
+                                                     dtype=np.float64)
+
+
+def packet_samples(data) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    pack_nums = np.fromiter((sample.PackNum for sample in data), dtype=np.int64, count=len(data))
+    counts = np.fromiter((len(sample.Samples) for sample in data), dtype=np.int64, count=len(data))
+    return pack_nums, np.fromiter(chain.from_iterable(sample.Samples for sample in data), dtype=np.float64), counts
+
+
+def signal_packets(rows: np.ndarray) -> List[CallibriSignalData]:
+    return [CallibriSignalData(PackNum=int(packet['pack_num'][0]), Samples=packet['samples'][:, 0].tolist())
+            for packet in np.split(rows, np.flatnonzero(np.diff(rows['pack_num'])) + 1)]
+
+
+class SignalRingBuffer:
+    def __init__(self, capacity: int):
+        self.__data = np.zeros(capacity, dtype=np.float64)
+        self.capacity = capacity
+        self.__start = 0
+        self.__end = 0
+        self.__lock = Lock()
+        self.dropped = 0
+
+    def __len__(self):
+        return self.__end - self.__start
+
+    def extend(self, samples):
+        values = np.asarray(samples, dtype=np.float64)
+        count = len(values)
+        capacity = self.capacity
+        with self.__lock:
+            if count >= capacity:
+                self.dropped += self.__end - self.__start + count - capacity
+                self.__data[:] = values[count - capacity:]
+                self.__start, self.__end = 0, capacity
+                return
+            if self.__end + count > capacity:
+                overflow = self.__end - self.__start + count - capacity
+                if overflow > 0:
+                    self.dropped += overflow
+                    self.__start += overflow
+                size = self.__end - self.__start
+                self.__data[:size] = self.__data[self.__start:self.__end]
+                self.__start, self.__end = 0, size
+            self.__data[self.__end:self.__end + count] = values
+            self.__end += count
+
+    # returned window is a view and stays valid until the next extend()
+    def read(self, count: int) -> Optional[np.ndarray]:
+        with self.__lock:
+            if self.__end - self.__start < count:
+                return None
+            window = self.__data[self.__start:self.__start + count]
+            self.__start += count
+            return window
+
+    def clear(self):
+        with self.__lock:
+            self.__start = 0
+            self.__end = 0
+
+
+class CallibriAdditional(SensorDevice):
+    def __init__(self, need_reconnect: bool, sensor: CallibriSensor, profile: EcgProfile = DEFAULT_PROFILE):
+        super().__init__(need_reconnect, sensor, profile.sampling_rate)
+        self.profile = profile
+        self.ecg_math: CallibriMath = CallibriMath(profile.sampling_rate, profile.data_window, profile.nwins)
+        self.ecg_math.init_filter()
+        self.buf_size = profile.chunk_size
+        self.signal_data = SignalRingBuffer(self.buf_size * 50)
+        self.window_started: Optional[float] = None
+        self.shard_offset = 0
+
+    def reset_math(self):
+        self.ecg_math = CallibriMath(self.profile.sampling_rate, self.profile.data_window, self.profile.nwins)
+        self.ecg_math.init_filter()
+        self.signal_data.clear()
+
+    def apply_profile(self, profile: EcgProfile):
+        self.profile = profile
+        self.sampling_rate = profile.sampling_rate
+        self.buf_size = profile.chunk_size
+        self.signal_data = SignalRingBuffer(self.buf_size * 50)
+        self.reset_math()
+
+
+class CallibriCore(SensorController):
+    FOUND_EVENT = 'foundedDevices'
+    CHANNELS = 1
+    CHANNEL_NAMES = ['ECG']
+    BATCH_EVENT = 'hrValuesBatch'
+    BATCH_FIELDS = [('hr', '<f8')]
+
+    def __init__(self, scanner=None, reconnect_workers: int = 8):
+        if scanner is None:
+            scanner = Scanner([SensorFamily.LECallibri, SensorFamily.LEKolibri])
+        super().__init__(scanner, reconnect_workers)
+        self.__shards: Optional[ShardedEcgMath] = None
+
+    def _make_info(self, si: SensorInfo) -> CallibriInfo:
+        return CallibriInfo(Name=si.Name, Address=si.Address, sensor_info=si)
+
+    def _configure_sensor(self, sensor: CallibriSensor, profile: EcgProfile = DEFAULT_PROFILE):
+        sensor.signal_type = CallibriSignalType.ECG
+        sensor.sampling_frequency = profile.sensor_frequency
+        sensor.hardware_filters = [SensorFilter.HPFBwhLvl1CutoffFreq1Hz,
+                                   SensorFilter.BSFBwhLvl2CutoffFreq45_55Hz,
+                                   SensorFilter.BSFBwhLvl2CutoffFreq55_65Hz]
+
+    def _create_device(self, need_reconnect: bool, sensor: CallibriSensor,
+                       profile: EcgProfile = DEFAULT_PROFILE) -> CallibriAdditional:
+        return CallibriAdditional(need_reconnect, sensor, profile)
+
+    def _packet_samples(self, data: List[CallibriSignalData]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        return packet_samples(data)
+
+    def _signal_rows(self, data: List[CallibriSignalData]) -> Tuple[np.ndarray, np.ndarray]:
+        return signal_rows(data)
+
+    def _signal_packets(self, rows: np.ndarray) -> List[CallibriSignalData]:
+        return signal_packets(rows)
+
+    def connect_to(self, info: CallibriInfo, need_reconnect: bool = False, profile: EcgProfile = DEFAULT_PROFILE):
+        super().connect_to(info, need_reconnect, profile=profile)
+
+    def connect_many(self, infos: List[CallibriInfo], need_reconnect: bool = False, max_parallel: int = 8,
+                     timeout: float = 15.0, retries: int = 2, retry_delay: float = 1.0,
+                     profile: EcgProfile = DEFAULT_PROFILE):
+        return super().connect_many(infos, need_reconnect, max_parallel, timeout, retries, retry_delay,
+                                    profile=profile)
+
+    def start_calculations(self, address: str, use_worker: bool = False, profile: Optional[EcgProfile] = None):
+        return super().start_calculations(address, use_worker, profile=profile)
+
+    def start_calculations_many(self, addresses: List[str], use_worker: bool = False,
+                                profile: Optional[EcgProfile] = None):
+        return [self.start_calculations(address, use_worker, profile) for address in addresses]
+
+    def add_replay_device(self, address: str, profile: EcgProfile = DEFAULT_PROFILE):
+        super().add_replay_device(address, profile=profile)
+
+    def _prepare_calculations(self, address: str, device: CallibriAdditional, profile: Optional[EcgProfile] = None):
+        if profile is not None and profile != device.profile:
+            if profile.sampling_rate != device.profile.sampling_rate:
+                device.sensor.sampling_frequency = profile.sensor_frequency
+            device.apply_profile(profile)
+
+    def _signal_receiver(self, address: str, use_worker: bool):
+        if self.__shards is not None:
+            self.__add_shard(address)
+            return lambda sensor, data: self.__push_shard(address, data)
+        return super()._signal_receiver(address, use_worker)
+
+    def _process(self, address: str, device: CallibriAdditional, samples: np.ndarray, started: float,
+                 arrived: float):
+        latency = self._latency
+        math = device.ecg_math
+        buf_size = device.buf_size
+        buffer = device.signal_data
+
+        if len(buffer) == 0:
+            device.window_started = arrived
+        buffer.extend(samples)
+        latency.record(address, 'buffer_depth', len(buffer))
+        while (raw_data := buffer.read(buf_size)) is not None:
+            window_read = time.perf_counter()
+            math.push_data(raw_data)
+            pushed = time.perf_counter()
+            math.process_data_arr()
+            processed = time.perf_counter()
+            # the window ends where the samples still in the buffer begin
+            sample_index, timestamp = self._stamp_result(device, device.timeline.sample_index - len(buffer))
+            rr_detected = math.rr_detected()
+            self._deliver('hasRRPicks', address, rr_detected)
+            if rr_detected:
+                self.__deliver_hr(address, sample_index, timestamp, math.get_hr())
+            emitted = time.perf_counter()
+            latency.record(address, 'buffer', window_read - device.window_started)
+            latency.record(address, 'push', pushed - window_read)
+            latency.record(address, 'process', processed - pushed)
+            latency.record(address, 'emit', emitted - processed)
+            latency.record(address, 'total', emitted - device.window_started)
+            device.window_started = arrived
+
+    def _reset_device(self, address: str, device: CallibriAdditional):
+        if self.__shards is not None:
+            self.__add_shard(address)
+        else:
+            device.reset_math()
+
+    def enable_sharded_processing(self, shards: int = os.cpu_count()):
+        if self.__shards is None:
+            self.__shards = ShardedEcgMath(self.__shard_result, shards)
+
+    def shard_stats(self) -> Optional[dict]:
+        return self.__shards.stats() if self.__shards is not None else None
+
+    def __add_shard(self, address: str):
+        device = self._devices[address]
+        self.__shards.add(address, sampling_rate=device.profile.sampling_rate, data_window=device.profile.data_window,
+                          nwins=device.profile.nwins, buf_size=device.buf_size, capacity=device.signal_data.capacity)
+
+    def __push_shard(self, address: str, data: List[CallibriSignalData]):
+        try:
+            device = self._devices[address]
+            written = self.__shards.push(address, self._advance(address, device, data))
+            if written is not None:
+                # maps positions in the shared ring back to sample indexes of the timeline
+                device.shard_offset = device.timeline.sample_index - written
+        except Exception as err:
+            print(err)
+
+    def __shard_result(self, address: str, rr_detected: bool, hr: float, consumed: int):
+        device = self._devices.get(address)
+        if device is None:
+            return
+        processed = time.perf_counter()
+        sample_index, timestamp = self._stamp_result(device, consumed + device.shard_offset)
+        self._deliver('hasRRPicks', address, rr_detected)
+        if rr_detected:
+            self.__deliver_hr(address, sample_index, timestamp, hr)
+        self._latency.record(address, 'emit', time.perf_counter() - processed)
+
+    def __deliver_hr(self, address: str, sample_index: int, timestamp: float, hr: float):
+        batcher = self._batcher
+        if batcher is not None:
+            batcher.append(address, sample_index, timestamp, hr)
+        else:
+            self._deliver('hrValuesUpdated', address, hr)
+
+    def _stop_pipeline(self, address: str):
+        super()._stop_pipeline(address)
+        if self.__shards is not None:
+            self.__shards.remove(address)
+
+    def _shutdown(self):
+        if self.__shards is not None:
+            self.__shards.stop()
+            self.__shards = None
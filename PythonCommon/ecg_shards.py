@@ -0,0 +1,197 @@
+import os
+import queue
+import sys
+import multiprocessing
+from multiprocessing import shared_memory
+from threading import Thread, Lock
+from typing import Optional
+
+import numpy as np
+
+from callibri_ecg.callibri_ecg_lib import CallibriMath
+
+HEADER_SIZE = 16
+
+
+class SharedSignalRing:
+    def __init__(self, capacity: int, name: Optional[str] = None):
+        create = name is None
+        kwargs = {'track': False} if not create and sys.version_info >= (3, 13) else {}
+        self.__memory = shared_memory.SharedMemory(name=name, create=create,
+                                                   size=HEADER_SIZE + capacity * 8, **kwargs)
+        self.__positions = np.ndarray((2,), dtype=np.int64, buffer=self.__memory.buf)
+        self.__data = np.ndarray((capacity,), dtype=np.float64, buffer=self.__memory.buf, offset=HEADER_SIZE)
+        if create:
+            self.__positions[:] = 0
+        self.capacity = capacity
+        self.dropped = 0
+        self.__lock = Lock()
+
+    @property
+    def name(self) -> str:
+        return self.__memory.name
+
+    # one producer per ring; the lock only keeps a late packet from writing into a closed segment.
+    # Returns the total number of samples written so far, None once the ring is closed
+    def write(self, values) -> Optional[int]:
+        values = np.asarray(values, dtype=np.float64)
+        with self.__lock:
+            if self.__data is None:
+                return None
+            write_pos, read_pos = int(self.__positions[0]), int(self.__positions[1])
+            free = self.capacity - (write_pos - read_pos)
+            if len(values) > free:
+                self.dropped += len(values) - free
+                values = values[:free]
+            start = write_pos % self.capacity
+            first = min(len(values), self.capacity - start)
+            self.__data[start:start + first] = values[:first]
+            self.__data[:len(values) - first] = values[first:]
+            self.__positions[0] = write_pos + len(values)
+            return write_pos + len(values)
+
+    def read(self, count: int) -> Optional[np.ndarray]:
+        write_pos, read_pos = int(self.__positions[0]), int(self.__positions[1])
+        if write_pos - read_pos < count:
+            return None
+        start = read_pos % self.capacity
+        end = start + count
+        if end <= self.capacity:
+            window = self.__data[start:end].copy()
+        else:
+            window = np.concatenate((self.__data[start:], self.__data[:end - self.capacity]))
+        self.__positions[1] = read_pos + count
+        return window
+
+    @property
+    def consumed(self) -> int:
+        return int(self.__positions[1])
+
+    def close(self):
+        with self.__lock:
+            self.__positions = None
+            self.__data = None
+            self.__memory.close()
+
+    def unlink(self):
+        self.__memory.unlink()
+
+
+def _apply_task(task, devices: dict) -> bool:
+    if task is None:
+        return False
+    if task[0] == 'add':
+        _, address, name, capacity, sampling_rate, data_window, nwins, buf_size = task
+        ring = SharedSignalRing(capacity, name)
+        try:
+            math = CallibriMath(sampling_rate, data_window, nwins)
+            math.init_filter()
+        except Exception:
+            ring.close()
+            ring.unlink()
+            raise
+        devices[address] = (ring, math, buf_size)
+    elif task[0] == 'remove':
+        device = devices.pop(task[1], None)
+        if device is not None:
+            device[0].close()
+            device[0].unlink()
+    return True
+
+
+def ecg_shard_worker(tasks, results, poll_interval: float):
+    devices = {}
+    running = True
+    while running:
+        pending = []
+        try:
+            pending.append(tasks.get(timeout=poll_interval))
+            while pending[-1] is not None:
+                pending.append(tasks.get_nowait())
+        except queue.Empty:
+            pass
+        for task in pending:
+            try:
+                running = _apply_task(task, devices)
+            except Exception as err:
+                print(err)
+        batch = []
+        for address, (ring, math, buf_size) in devices.items():
+            try:
+                while (raw_data := ring.read(buf_size)) is not None:
+                    math.push_data(raw_data)
+                    math.process_data_arr()
+                    rr_detected = math.rr_detected()
+                    batch.append((address, rr_detected, math.get_hr() if rr_detected else 0.0, ring.consumed))
+            except Exception as err:
+                print(err)
+        if len(batch) > 0:
+            results.put(batch)
+    for ring, _, _ in devices.values():
+        ring.close()
+        ring.unlink()
+
+
+class ShardedEcgMath:
+    def __init__(self, on_result, shards: int = os.cpu_count(), poll_interval: float = 0.01):
+        context = multiprocessing.get_context('spawn')
+        self.__on_result = on_result
+        self.__tasks = [context.Queue() for _ in range(shards)]
+        self.__results = context.Queue()
+        self.__processes = [context.Process(target=ecg_shard_worker, args=(tasks, self.__results, poll_interval),
+                                            daemon=True) for tasks in self.__tasks]
+        for process in self.__processes:
+            process.start()
+        self.__rings = {}
+        self.__lock = Lock()
+        self.__reader = Thread(target=self.__read_results, daemon=True)
+        self.__reader.start()
+
+    def add(self, address: str, sampling_rate: int = 1000, data_window: int = 500, nwins: int = 30,
+            buf_size: int = 100, capacity: int = 100 * 50):
+        self.remove(address)
+        with self.__lock:
+            loads = [0] * len(self.__tasks)
+            for _, shard in self.__rings.values():
+                loads[shard] += 1
+            shard = loads.index(min(loads))
+            ring = SharedSignalRing(capacity)
+            self.__rings[address] = (ring, shard)
+        self.__tasks[shard].put(('add', address, ring.name, capacity, sampling_rate, data_window, nwins, buf_size))
+
+    # the shard worker unlinks the segment, after it has attached to it
+    def remove(self, address: str):
+        with self.__lock:
+            ring, shard = self.__rings.pop(address, (None, None))
+        if ring is not None:
+            self.__tasks[shard].put(('remove', address))
+            ring.close()
+
+    # packets that arrive after remove() are dropped
+    def push(self, address: str, samples) -> Optional[int]:
+        entry = self.__rings.get(address)
+        return entry[0].write(samples) if entry is not None else None
+
+    def __read_results(self):
+        while (batch := self.__results.get()) is not None:
+            for address, rr_detected, hr, consumed in batch:
+                try:
+                    self.__on_result(address, rr_detected, hr, consumed)
+                except Exception as err:
+                    print(err)
+
+    def stats(self) -> dict:
+        with self.__lock:
+            return {'shards': len(self.__processes),
+                    'devices': {address: {'shard': shard, 'dropped': ring.dropped}
+                                for address, (ring, shard) in self.__rings.items()}}
+
+    def stop(self):
+        for address in list(self.__rings.keys()):
+            self.remove(address)
+        for tasks in self.__tasks:
+            tasks.put(None)
+        for process in self.__processes:
+            process.join(timeout=1)
+        self.__results.put(None)
+        self.__reader.join(timeout=1)
@@ -0,0 +1,88 @@
+import json
+import time
+from bisect import bisect_right
+from threading import Thread, Lock, Event
+from typing import List, Optional
+
+LATENCY_EDGES = [1e-6 * 2 ** (index / 4) for index in range(100)]
+DEPTH_EDGES = [0] + [2 ** index for index in range(20)]
+
+
+class Histogram:
+    def __init__(self, edges: List[float]):
+        self.__edges = edges
+        self.__counts = [0] * (len(edges) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, value: float):
+        self.__counts[bisect_right(self.__edges, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, percent: float) -> float:
+        target = percent / 100 * self.count
+        seen = 0
+        for index, count in enumerate(self.__counts):
+            seen += count
+            if count > 0 and seen >= target:
+                return min(self.__edges[index], self.max) if index < len(self.__edges) else self.max
+        return self.max
+
+    def summary(self) -> dict:
+        return {'count': self.count,
+                'mean': self.total / self.count if self.count > 0 else 0.0,
+                'p50': self.percentile(50),
+                'p95': self.percentile(95),
+                'p99': self.percentile(99),
+                'max': self.max}
+
+
+class LatencyStats:
+    def __init__(self):
+        self.__devices = {}
+        self.__lock = Lock()
+        self.__dump_stopped: Optional[Event] = None
+
+    def record(self, address: str, stage: str, value: float):
+        histograms = self.__devices.get(address)
+        histogram = histograms.get(stage) if histograms is not None else None
+        if histogram is None:
+            with self.__lock:
+                histograms = self.__devices.setdefault(address, {})
+                histogram = histograms.setdefault(stage, Histogram(DEPTH_EDGES if stage.endswith('_depth')
+                                                                   else LATENCY_EDGES))
+        histogram.record(value)
+
+    def remove(self, address: str):
+        with self.__lock:
+            self.__devices.pop(address, None)
+
+    def summary(self) -> dict:
+        with self.__lock:
+            return {address: {stage: histogram.summary() for stage, histogram in histograms.items()}
+                    for address, histograms in self.__devices.items()}
+
+    def start_dump(self, interval: float = 10.0, path: Optional[str] = None):
+        self.stop_dump()
+        stopped = Event()
+        self.__dump_stopped = stopped
+
+        def dump():
+            while not stopped.wait(interval):
+                line = json.dumps({'time': time.time(), 'stats': self.summary()})
+                if path is None:
+                    print(line)
+                else:
+                    with open(path, 'a') as file:
+                        file.write(line + '\n')
+
+        Thread(target=dump, daemon=True).start()
+
+    def stop_dump(self):
+        if self.__dump_stopped is not None:
+            self.__dump_stopped.set()
+            self.__dump_stopped = None
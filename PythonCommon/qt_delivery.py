@@ -0,0 +1,105 @@
+from threading import Lock
+from typing import Optional
+
+from PyQt6.QtCore import QObject, pyqtSignal, QThread, QTimer
+
+
+class UpdateCoalescer:
+    def __init__(self):
+        self.__pending = {}
+        self.__delivered = {}
+        self.__lock = Lock()
+
+    def put(self, address: str, name: str, value):
+        with self.__lock:
+            self.__pending[(address, name)] = value
+
+    def take(self) -> dict:
+        with self.__lock:
+            pending = self.__pending
+            self.__pending = {}
+        updates = {}
+        for key, value in pending.items():
+            if key not in self.__delivered or self.__delivered[key] != value:
+                self.__delivered[key] = value
+                updates.setdefault(key[0], {})[key[1]] = value
+        return updates
+
+    def forget(self, address: str):
+        with self.__lock:
+            for key in [key for key in self.__pending if key[0] == address]:
+                self.__pending.pop(key)
+        for key in [key for key in self.__delivered if key[0] == address]:
+            self.__delivered.pop(key)
+
+
+class Worker(QObject):
+    finished = pyqtSignal()
+
+    def __init__(self, work):
+        super().__init__()
+        self.work = work
+
+    def run(self):
+        self.work()
+        self.finished.emit()
+
+
+class QtDelivery:
+    RESULT_NAMES = {}
+
+    def __init__(self):
+        self.__coalescer: Optional[UpdateCoalescer] = None
+        self.__coalesce_timer: Optional[QTimer] = None
+        self.__workers = []
+
+    def _deliver(self, event: str, *args):
+        coalescer = self.__coalescer
+        name = self.RESULT_NAMES.get(event)
+        if coalescer is None or name is None:
+            getattr(self, event).emit(*args)
+        else:
+            coalescer.put(args[0], name, args[1])
+
+    def _start_background(self, work):
+        thread = QThread()
+        worker = Worker(work)
+        worker.moveToThread(thread)
+        thread.started.connect(worker.run)
+        worker.finished.connect(thread.quit)
+        thread.finished.connect(self.__release_workers)
+        self.__workers.append((thread, worker))
+        thread.start()
+
+    def __release_workers(self):
+        self.__workers = [(thread, worker) for thread, worker in self.__workers if not thread.isFinished()]
+
+    def enable_coalescing(self, rate: float = 10.0):
+        if self.__coalescer is None:
+            self.__coalescer = UpdateCoalescer()
+            self.__coalesce_timer = QTimer(self)
+            self.__coalesce_timer.timeout.connect(self.__flush_updates)
+        self.__coalesce_timer.start(int(1000 / rate))
+
+    def disable_coalescing(self):
+        if self.__coalescer is not None:
+            self.__coalesce_timer.stop()
+            self.__flush_updates()
+            self.__coalesce_timer.deleteLater()
+            self.__coalesce_timer = None
+            self.__coalescer = None
+
+    def __flush_updates(self):
+        updates = self.__coalescer.take()
+        if updates:
+            self.resultsUpdated.emit(updates)
+
+    def stop_calculations(self, address: str):
+        if self.__coalescer is not None:
+            self.__coalescer.forget(address)
+        super().stop_calculations(address)
+
+    def stop_all(self):
+        if self.__coalesce_timer is not None:
+            self.__coalesce_timer.stop()
+        super().stop_all()
@@ -0,0 +1,34 @@
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+class ResistMonitor:
+    def __init__(self, channels: int, threshold: float = 2500000.0, hysteresis: float = 0.1, window: int = 5):
+        self.__bad_level = threshold
+        self.__normal_level = threshold * (1.0 - hysteresis)
+        self.__window = np.zeros((max(1, window), channels))
+        self.__filled = 0
+        self.__position = 0
+        self.levels: Optional[np.ndarray] = None
+        self.states: Optional[Tuple[bool, ...]] = None
+
+    # returns per-channel "bad" flags only when at least one of them changed
+    def update(self, values) -> Optional[Tuple[bool, ...]]:
+        window = self.__window
+        window[self.__position] = values
+        self.__position = (self.__position + 1) % len(window)
+        self.__filled = min(self.__filled + 1, len(window))
+        levels = np.median(window[:self.__filled], axis=0)
+        self.levels = levels
+
+        if self.states is None:
+            states = tuple((levels >= self.__bad_level).tolist())
+        else:
+            bad = np.array(self.states)
+            bad = np.where(bad, levels >= self.__normal_level, levels >= self.__bad_level)
+            states = tuple(bad.tolist())
+        if states == self.states:
+            return None
+        self.states = states
+        return states
@@ -0,0 +1,123 @@
+import asyncio
+import json
+import time
+from dataclasses import is_dataclass, asdict
+from enum import Enum
+from threading import Lock
+from typing import List, Optional
+
+
+def encode_value(value):
+    if is_dataclass(value):
+        return asdict(value)
+    if isinstance(value, Enum):
+        return value.name
+    if hasattr(value, 'item'):
+        return value.item()
+    raise TypeError("{} is not serializable".format(type(value).__name__))
+
+
+class Subscriber:
+    def __init__(self, writer: asyncio.StreamWriter, max_events: int):
+        self.writer = writer
+        self.queue = asyncio.Queue(max_events)
+        self.sent = 0
+        self.dropped = 0
+        self.reported = 0
+
+    def put(self, line: bytes):
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(line)
+
+
+class ResultService:
+    def __init__(self, host: str = '127.0.0.1', port: int = 8765, path: Optional[str] = None,
+                 max_events: int = 1024):
+        self.__host = host
+        self.__port = port
+        self.__path = path
+        self.__max_events = max_events
+        self.__loop: Optional[asyncio.AbstractEventLoop] = None
+        self.__server: Optional[asyncio.AbstractServer] = None
+        self.__subscribers: List[Subscriber] = []
+        self.__pending = []
+        self.__scheduled = False
+        self.__lock = Lock()
+        self.__published = 0
+        self.__batches = 0
+
+    async def start(self):
+        self.__loop = asyncio.get_running_loop()
+        if self.__path is not None:
+            self.__server = await asyncio.start_unix_server(self.__serve_client, path=self.__path)
+        else:
+            self.__server = await asyncio.start_server(self.__serve_client, self.__host, self.__port)
+
+    async def serve_forever(self):
+        await self.__server.serve_forever()
+
+    async def stop(self):
+        if self.__server is not None:
+            self.__server.close()
+            for subscriber in list(self.__subscribers):
+                subscriber.writer.close()
+            await self.__server.wait_closed()
+            self.__server = None
+
+    def publish(self, address: str, event: str, value):
+        loop = self.__loop
+        if loop is None or loop.is_closed():
+            return
+        with self.__lock:
+            self.__pending.append((time.time(), address, event, value))
+            if self.__scheduled:
+                return
+            self.__scheduled = True
+        loop.call_soon_threadsafe(self.__flush)
+
+    def __flush(self):
+        with self.__lock:
+            pending, self.__pending = self.__pending, []
+            self.__scheduled = False
+        self.__published += len(pending)
+        self.__batches += 1
+        if not self.__subscribers:
+            return
+        for moment, address, event, value in pending:
+            try:
+                line = json.dumps({'time': moment, 'address': address, 'event': event, 'value': value},
+                                  default=encode_value).encode() + b'\n'
+            except Exception as err:
+                print(err)
+                continue
+            for subscriber in self.__subscribers:
+                subscriber.put(line)
+
+    async def __serve_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        subscriber = Subscriber(writer, self.__max_events)
+        self.__subscribers.append(subscriber)
+        try:
+            while True:
+                lines = [await subscriber.queue.get()]
+                while not subscriber.queue.empty():
+                    lines.append(subscriber.queue.get_nowait())
+                if subscriber.dropped > subscriber.reported:
+                    lines.insert(0, json.dumps({'time': time.time(), 'address': None, 'event': 'dropped',
+                                                'value': subscriber.dropped - subscriber.reported}).encode() + b'\n')
+                    subscriber.reported = subscriber.dropped
+                writer.write(b''.join(lines))
+                await writer.drain()
+                subscriber.sent += len(lines)
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self.__subscribers.remove(subscriber)
+            writer.close()
+
+    def stats(self) -> dict:
+        return {'published': self.__published,
+                'batches': self.__batches,
+                'subscribers': [{'sent': subscriber.sent, 'queued': subscriber.queue.qsize(),
+                                 'dropped': subscriber.dropped} for subscriber in self.__subscribers]}
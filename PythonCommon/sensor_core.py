@@ -0,0 +1,1025 @@
+import random
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError
+from dataclasses import dataclass
+from enum import Enum
+from itertools import chain
+from queue import Queue, Empty
+from threading import Thread, Lock, Condition, Event, current_thread
+from typing import Any, Callable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from neurosdk.cmn_types import SensorInfo, SensorState, SensorCommand
+from neurosdk.scanner import Scanner
+from neurosdk.sensor import Sensor
+
+from latency_stats import LatencyStats
+from signal_quality import SignalQuality, ChannelQuality
+from signal_recording import SignalRecorder, RecordingWriter, ReplaySensor, replay_recording
+
+
+class ConnectionState(Enum):
+    Connection = 0
+    Connected = 1
+    Disconnection = 2
+    Disconnected = 3
+    Error = 4
+
+
+class GapPolicy(Enum):
+    Ignore = 0
+    Fill = 1
+    Reset = 2
+
+
+@dataclass
+class SignalGap:
+    sample_index: int
+    missing: int
+    pack_num: int
+    next_pack_num: int
+    action: GapPolicy
+
+
+class SignalTimeline:
+    def __init__(self, sampling_rate: float, policy: GapPolicy = GapPolicy.Ignore, max_fill: float = 1.0):
+        self.sampling_rate = sampling_rate
+        self.policy = policy
+        self.max_fill = int(max_fill * sampling_rate)
+        self.pack_num: Optional[int] = None
+        self.sample_index = 0
+        self.started: Optional[float] = None
+        self.gaps = 0
+        self.lost_samples = 0
+        self.filled_samples = 0
+        self.__last_sample = None
+        self.__reconnected = False
+
+    def mark_reconnect(self):
+        self.__reconnected = True
+
+    def timestamp(self, sample_index: int) -> float:
+        return self.started + sample_index / self.sampling_rate
+
+    # counts is the number of samples in each packet, None for one sample per packet
+    def advance(self, pack_nums: np.ndarray, samples: np.ndarray,
+                counts: Optional[np.ndarray] = None) -> Tuple[np.ndarray, List[SignalGap]]:
+        if len(pack_nums) < 1:
+            return samples, []
+        if self.pack_num is None:
+            self.started = time.time()
+            self.pack_num = int(pack_nums[0]) - 1
+        steps = np.diff(pack_nums, prepend=self.pack_num)
+        broken = np.flatnonzero(steps != 1)
+        gaps = []
+        if len(broken) > 0:
+            offsets = np.cumsum(counts) - counts if counts is not None else np.arange(len(pack_nums))
+            pieces = []
+            position = 0
+            shift = 0
+            filled = 0
+            for index in broken.tolist():
+                offset = int(offsets[index])
+                step = int(steps[index])
+                if step > 1:
+                    missing = (step - 1) * (int(counts[index]) if counts is not None else 1)
+                elif index == 0 and self.__reconnected:
+                    # the counter restarted after a reconnect, the number of lost samples is unknown
+                    missing = 0
+                else:
+                    # a repeated packet or a counter wrap, not a gap
+                    continue
+                previous = samples[offset - 1] if offset > 0 else self.__last_sample
+                if self.policy == GapPolicy.Fill and 0 < missing <= self.max_fill and previous is not None:
+                    pieces.append(samples[position:offset])
+                    pieces.append(np.linspace(previous, samples[offset], missing + 2)[1:-1])
+                    position = offset
+                    action = GapPolicy.Fill
+                    filled += missing
+                elif self.policy != GapPolicy.Ignore:
+                    action = GapPolicy.Reset
+                else:
+                    action = GapPolicy.Ignore
+                gaps.append(SignalGap(sample_index=self.sample_index + offset + shift, missing=missing,
+                                      pack_num=int(pack_nums[index - 1]) if index > 0 else self.pack_num,
+                                      next_pack_num=int(pack_nums[index]), action=action))
+                shift += missing
+                self.lost_samples += missing
+            if pieces:
+                pieces.append(samples[position:])
+                samples = np.concatenate(pieces)
+            self.sample_index += shift - filled
+            self.filled_samples += filled
+            self.gaps += len(gaps)
+        self.sample_index += len(samples)
+        self.pack_num = int(pack_nums[-1])
+        self.__reconnected = False
+        self.__last_sample = samples[-1].copy()
+        return samples, gaps
+
+    def stats(self) -> dict:
+        return {'sample_index': self.sample_index,
+                'timestamp': self.timestamp(self.sample_index) if self.started is not None else None,
+                'pack_num': self.pack_num,
+                'gaps': self.gaps,
+                'lost_samples': self.lost_samples,
+                'filled_samples': self.filled_samples}
+
+
+class SignalPipeline:
+    def __init__(self, process, max_packets: int = 256, address: Optional[str] = None,
+                 latency: Optional[LatencyStats] = None):
+        self.__process = process
+        self.__max_packets = max_packets
+        self.__address = address
+        self.__latency = latency
+        self.__packets = deque()
+        self.__condition = Condition()
+        self.__running = True
+        self.received = 0
+        self.processed = 0
+        self.dropped = 0
+        self.__thread = Thread(target=self.__run, daemon=True)
+        self.__thread.start()
+
+    def put(self, sensor, data):
+        with self.__condition:
+            if len(self.__packets) >= self.__max_packets:
+                self.__packets.popleft()
+                self.dropped += 1
+            self.__packets.append((sensor, data, time.perf_counter()))
+            self.received += 1
+            if self.__latency is not None:
+                self.__latency.record(self.__address, 'queue_depth', len(self.__packets))
+            self.__condition.notify()
+
+    def __run(self):
+        while True:
+            with self.__condition:
+                while self.__running and not self.__packets:
+                    self.__condition.wait()
+                if not self.__running:
+                    return
+                packets = list(self.__packets)
+                self.__packets.clear()
+            for sensor, data, arrived in packets:
+                if not self.__running:
+                    return
+                try:
+                    self.__process(sensor, data, arrived)
+                except Exception as err:
+                    print(err)
+                self.processed += 1
+
+    def stats(self) -> dict:
+        with self.__condition:
+            return {'queued': len(self.__packets),
+                    'max_packets': self.__max_packets,
+                    'received': self.received,
+                    'processed': self.processed,
+                    'dropped': self.dropped}
+
+    def stop(self, timeout: float = 5.0):
+        with self.__condition:
+            self.__running = False
+            self.__packets.clear()
+            self.__condition.notify()
+        if current_thread() is not self.__thread:
+            self.__thread.join(timeout)
+
+
+class BatchScheduler:
+    def __init__(self, workers: int = 4, max_packets: int = 256, latency: Optional[LatencyStats] = None):
+        self.__max_packets = max_packets
+        self.__latency = latency
+        self.__processors = {}
+        self.__sensors = {}
+        self.__pending = {}
+        self.__ready = deque()
+        self.__queued = set()
+        self.__busy = {}
+        lock = Lock()
+        self.__condition = Condition(lock)
+        self.__idle = Condition(lock)
+        self.__running = True
+        self.batches = 0
+        self.packets = 0
+        self.dropped = 0
+        self.__threads = [Thread(target=self.__run, daemon=True) for _ in range(workers)]
+        for thread in self.__threads:
+            thread.start()
+
+    def register(self, address: str, process):
+        with self.__condition:
+            self.__processors[address] = process
+            self.__pending[address] = deque()
+
+    # waits for the batch in flight, so the device math is not touched after this returns
+    def unregister(self, address: str, timeout: float = 5.0):
+        with self.__condition:
+            self.__processors.pop(address, None)
+            self.__sensors.pop(address, None)
+            self.__pending.pop(address, None)
+            if self.__busy.get(address, current_thread()) is not current_thread():
+                self.__idle.wait_for(lambda: address not in self.__busy, timeout)
+
+    def put(self, address: str, sensor, data):
+        with self.__condition:
+            pending = self.__pending.get(address)
+            if pending is None:
+                return
+            if len(pending) >= self.__max_packets:
+                pending.popleft()
+                self.dropped += 1
+            pending.append((data, time.perf_counter()))
+            self.__sensors[address] = sensor
+            if self.__latency is not None:
+                self.__latency.record(address, 'queue_depth', len(pending))
+            self.__schedule(address)
+
+    def __schedule(self, address: str):
+        if address not in self.__queued and address not in self.__busy:
+            self.__ready.append(address)
+            self.__queued.add(address)
+            self.__condition.notify()
+
+    def __run(self):
+        while True:
+            with self.__condition:
+                while self.__running and not self.__ready:
+                    self.__condition.wait()
+                if not self.__running:
+                    return
+                address = self.__ready.popleft()
+                self.__queued.discard(address)
+                pending = self.__pending.get(address)
+                if not pending:
+                    continue
+                packets = list(pending)
+                pending.clear()
+                self.__busy[address] = current_thread()
+                process = self.__processors[address]
+                sensor = self.__sensors[address]
+            try:
+                process(sensor, list(chain.from_iterable(data for data, _ in packets)), packets[0][1])
+            except Exception as err:
+                print(err)
+            with self.__condition:
+                self.__busy.pop(address, None)
+                self.__idle.notify_all()
+                self.batches += 1
+                self.packets += len(packets)
+                if self.__pending.get(address):
+                    self.__schedule(address)
+
+    def stats(self) -> dict:
+        with self.__condition:
+            return {'workers': len(self.__threads),
+                    'devices': len(self.__processors),
+                    'queued': sum(len(pending) for pending in self.__pending.values()),
+                    'batches': self.batches,
+                    'packets': self.packets,
+                    'dropped': self.dropped}
+
+    def stop(self, timeout: float = 5.0):
+        with self.__condition:
+            self.__running = False
+            self.__pending.clear()
+            self.__condition.notify_all()
+        for thread in self.__threads:
+            if thread is not current_thread():
+                thread.join(timeout)
+
+
+class SensorInfoCache:
+    def __init__(self, ttl: float = 30.0):
+        self.ttl = ttl
+        self.__infos = {}
+        self.__lock = Lock()
+
+    def update(self, sensors: List[SensorInfo]):
+        now = time.monotonic()
+        with self.__lock:
+            for si in sensors:
+                self.__infos[si.Address] = (si, now)
+
+    def fresh(self) -> List[SensorInfo]:
+        now = time.monotonic()
+        with self.__lock:
+            for address in [address for address, (_, seen) in self.__infos.items() if now - seen > self.ttl]:
+                self.__infos.pop(address)
+            return [si for si, _ in self.__infos.values()]
+
+
+@dataclass
+class ReconnectState:
+    lost_at: float
+    next_attempt: float
+    last_attempt: float = 0.0
+    attempts: int = 0
+    seen: bool = False
+
+
+class ReconnectScheduler:
+    def __init__(self, reconnect, on_recovered=None, base_delay: float = 1.0, max_delay: float = 30.0,
+                 max_workers: int = 4):
+        self.__reconnect = reconnect
+        self.__on_recovered = on_recovered
+        self.__base_delay = base_delay
+        self.__max_delay = max_delay
+        self.__devices = {}
+        self.__in_flight = set()
+        self.__pool = ThreadPoolExecutor(max_workers=max_workers)
+        self.__condition = Condition()
+        self.__running = True
+        self.attempts = 0
+        self.recovered = 0
+        self.__thread = Thread(target=self.__run, daemon=True)
+        self.__thread.start()
+
+    def add(self, address: str):
+        with self.__condition:
+            if address not in self.__devices:
+                now = time.monotonic()
+                self.__devices[address] = ReconnectState(lost_at=now, next_attempt=now, last_attempt=now)
+                self.__condition.notify()
+
+    def remove(self, address: str):
+        with self.__condition:
+            self.__devices.pop(address, None)
+
+    def found(self, addresses: List[str]):
+        with self.__condition:
+            for address in addresses:
+                state = self.__devices.get(address)
+                if state is not None:
+                    state.seen = True
+                    state.next_attempt = min(state.next_attempt, state.last_attempt + self.__base_delay)
+            self.__condition.notify()
+
+    def pending(self) -> List[str]:
+        with self.__condition:
+            return list(self.__devices.keys())
+
+    # connect() blocks until it times out when the device is not advertising, so devices the scanner
+    # has not reported since the last attempt only get a blind attempt once per max_delay
+    def __due_at(self, state: ReconnectState) -> float:
+        if state.seen:
+            return state.next_attempt
+        return max(state.next_attempt, state.last_attempt + self.__max_delay)
+
+    def __run(self):
+        while True:
+            with self.__condition:
+                while self.__running:
+                    now = time.monotonic()
+                    waiting = [(address, state) for address, state in self.__devices.items()
+                               if address not in self.__in_flight]
+                    due = [address for address, state in waiting if self.__due_at(state) <= now]
+                    if due:
+                        break
+                    self.__condition.wait(min(self.__due_at(state) for _, state in waiting) - now if waiting else None)
+                if not self.__running:
+                    return
+                due.sort(key=lambda address: not self.__devices[address].seen)
+                for address in due:
+                    self.__in_flight.add(address)
+                    self.__devices[address].last_attempt = now
+            for address in due:
+                self.__pool.submit(self.__attempt, address)
+
+    def __attempt(self, address: str):
+        try:
+            reconnected = self.__reconnect(address)
+        except Exception as err:
+            print(err)
+            reconnected = False
+        with self.__condition:
+            self.__in_flight.discard(address)
+            self.attempts += 1
+            state = self.__devices.get(address)
+            if state is None:
+                return
+            if not reconnected:
+                state.attempts += 1
+                state.seen = False
+                delay = min(self.__max_delay, self.__base_delay * 2 ** (state.attempts - 1))
+                state.next_attempt = time.monotonic() + delay * random.uniform(0.5, 1.5)
+                self.__condition.notify()
+                return
+            self.__devices.pop(address)
+            self.recovered += 1
+        if self.__on_recovered is not None:
+            self.__on_recovered(address, time.monotonic() - state.lost_at)
+
+    def stats(self) -> dict:
+        with self.__condition:
+            now = time.monotonic()
+            return {'pending': {address: {'attempts': state.attempts, 'down_for': now - state.lost_at}
+                                for address, state in self.__devices.items()},
+                    'attempts': self.attempts,
+                    'recovered': self.recovered}
+
+    def stop(self):
+        with self.__condition:
+            self.__running = False
+            self.__devices.clear()
+            self.__condition.notify()
+        self.__pool.shutdown(wait=False)
+
+
+@dataclass
+class ConnectResult:
+    address: str
+    connected: bool
+    attempts: int
+    latency: float
+    error: Optional[str] = None
+
+
+@dataclass
+class ConnectManyResult:
+    devices: List[ConnectResult]
+    connected: int
+    failed: int
+    seconds: float
+
+
+@dataclass
+class CommandResult:
+    address: str
+    command: SensorCommand
+    latency: float
+
+
+class CommandExecutor:
+    def __init__(self, max_workers: int = 4):
+        self.__pool = ThreadPoolExecutor(max_workers=max_workers)
+        self.__pending = {}
+        self.__lock = Lock()
+
+    def submit(self, address: str, command: SensorCommand, work) -> Future:
+        future = Future()
+        with self.__lock:
+            pending = self.__pending.get(address)
+            if pending is None:
+                self.__pending[address] = deque([(command, work, future, time.perf_counter())])
+                self.__pool.submit(self.__drain, address)
+            else:
+                pending.append((command, work, future, time.perf_counter()))
+        return future
+
+    def __drain(self, address: str):
+        while True:
+            with self.__lock:
+                pending = self.__pending[address]
+                if not pending:
+                    self.__pending.pop(address)
+                    return
+                command, work, future, submitted = pending.popleft()
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                work()
+                future.set_result(CommandResult(address=address, command=command,
+                                                latency=time.perf_counter() - submitted))
+            except Exception as err:
+                print(err)
+                future.set_exception(err)
+
+
+class ResultBatcher:
+    def __init__(self, fields: List[Tuple[str, str]], deliver, interval: float = 0.1):
+        self.dtype = np.dtype([('address', 'U32'), ('sample_index', '<i8'), ('timestamp', '<f8')] + fields)
+        self.batches = 0
+        self.records = 0
+        self.__deliver = deliver
+        self.__interval = interval
+        self.__rows = []
+        self.__lock = Lock()
+        self.__stopped = Event()
+        self.__thread = Thread(target=self.__run, daemon=True)
+        self.__thread.start()
+
+    def append(self, *row):
+        with self.__lock:
+            self.__rows.append(row)
+
+    def flush(self):
+        with self.__lock:
+            rows, self.__rows = self.__rows, []
+        if rows:
+            self.batches += 1
+            self.records += len(rows)
+            self.__deliver(np.array(rows, dtype=self.dtype))
+
+    def stats(self) -> dict:
+        return {'batches': self.batches, 'records': self.records, 'pending': len(self.__rows)}
+
+    def stop(self):
+        self.__stopped.set()
+        self.__thread.join()
+        self.flush()
+
+    def __run(self):
+        while not self.__stopped.wait(self.__interval):
+            try:
+                self.flush()
+            except Exception as err:
+                print(err)
+
+
+class SensorDevice:
+    def __init__(self, need_reconnect: bool, sensor: Sensor, sampling_rate: int):
+        self.need_reconnect: bool = need_reconnect
+        self.sensor: Sensor = sensor
+        self.sampling_rate = sampling_rate
+        self.is_signal = False
+        self.pipeline: Optional[SignalPipeline] = None
+        self.timeline: Optional[SignalTimeline] = None
+        self.quality: Optional[SignalQuality] = None
+        self.result_index = 0
+        self.result_time: Optional[float] = None
+
+    def reset_math(self):
+        pass
+
+
+class CallbackDelivery:
+    def _deliver(self, event: str, *args):
+        callback = getattr(self, event)
+        if callback is not None:
+            callback(*args)
+
+
+def lazy_singleton(module: str, name: str, factory: Callable[[], Any]) -> Callable[[str], Any]:
+    # module __getattr__ that builds the singleton on first access: importing a front-end
+    # (e.g. a spawned shard worker re-importing the entry script) must not open a scanner
+    lock = Lock()
+    instances = []
+
+    def __getattr__(attribute: str):
+        if attribute != name:
+            raise AttributeError("module '{}' has no attribute '{}'".format(module, attribute))
+        with lock:
+            if not instances:
+                instances.append(factory())
+        return instances[0]
+
+    return __getattr__
+
+
+class SensorController:
+    FOUND_EVENT = 'founded'
+    CHANNELS = 1
+    CHANNEL_NAMES = ['signal']
+    BATCH_EVENT: Optional[str] = None
+    BATCH_FIELDS: List[Tuple[str, str]] = []
+
+    def __init__(self, scanner, reconnect_workers: int = 8):
+        self.__scanner = scanner
+        self.__scanner.sensorsChanged = self.__sensors_changed
+        self.__sensor_cache = SensorInfoCache()
+        self.__discoveries = []
+        self.__discoveries_lock = Lock()
+        self._devices = {}
+        self.__reconnects = ReconnectScheduler(self.__reconnect, self.__recovered, max_workers=reconnect_workers)
+        self.connected_devices = list()
+        self.__commands = CommandExecutor()
+        self.__recordings = RecordingWriter()
+        self._latency = LatencyStats()
+        self.__gap_policy = GapPolicy.Ignore
+        self.__max_fill = 1.0
+        self.__quality_settings: Optional[dict] = None
+        self._batcher: Optional[ResultBatcher] = None
+
+    def _deliver(self, event: str, *args):
+        raise NotImplementedError
+
+    def _start_background(self, work):
+        thread = Thread(target=work)
+        thread.start()
+
+    def _make_info(self, si: SensorInfo):
+        raise NotImplementedError
+
+    def _configure_sensor(self, sensor: Sensor, **options):
+        pass
+
+    def _create_device(self, need_reconnect: bool, sensor: Sensor, **options) -> SensorDevice:
+        raise NotImplementedError
+
+    def _packet_samples(self, data) -> tuple:
+        raise NotImplementedError
+
+    def _process(self, address: str, device: SensorDevice, samples: np.ndarray, started: float, arrived: float):
+        raise NotImplementedError
+
+    def _signal_rows(self, data) -> Tuple[np.ndarray, np.ndarray]:
+        raise NotImplementedError
+
+    def _signal_packets(self, rows: np.ndarray) -> list:
+        raise NotImplementedError
+
+    def _prepare_calculations(self, address: str, device: SensorDevice, **options):
+        pass
+
+    def _reset_device(self, address: str, device: SensorDevice):
+        device.reset_math()
+
+    def _shutdown(self):
+        pass
+
+    def search_with_result(self, seconds: int, addresses: List[str]):
+        def __device_scan():
+            filtered_sensors = []
+            for info in self.discover(seconds, addresses):
+                filtered_sensors.append(info)
+                self._deliver('deviceFounded', info)
+            self._deliver(self.FOUND_EVENT, filtered_sensors)
+
+        self._start_background(__device_scan)
+
+    def discover(self, seconds: float, addresses: List[str] = [], use_cache: bool = True) -> Iterator:
+        wanted = set(addresses)
+        seen = set()
+        sensors = self.__sensor_cache.fresh() if use_cache else []
+        found = None
+        try:
+            deadline = time.monotonic() + seconds
+            while True:
+                for si in sensors:
+                    if si.Address not in seen and (len(wanted) < 1 or si.Address in wanted):
+                        seen.add(si.Address)
+                        yield self._make_info(si)
+                if len(wanted) > 0 and wanted <= seen:
+                    return
+                if found is None:
+                    found = Queue()
+                    with self.__discoveries_lock:
+                        self.__discoveries.append(found)
+                    self.__scanner.start()
+                    sensors = self.__scanner.sensors()
+                    self.__sensor_cache.update(sensors)
+                    continue
+                try:
+                    sensors = found.get(timeout=max(0.0, deadline - time.monotonic()))
+                except Empty:
+                    return
+        finally:
+            if found is not None:
+                with self.__discoveries_lock:
+                    self.__discoveries.remove(found)
+                self.__stop_scan_if_idle()
+
+    def cached_devices(self, addresses: List[str] = []) -> list:
+        return [self._make_info(si) for si in self.__sensor_cache.fresh()
+                if len(addresses) < 1 or si.Address in addresses]
+
+    def __sensors_changed(self, scanner: Scanner, sensors: List[SensorInfo]):
+        self.__sensor_cache.update(sensors)
+        with self.__discoveries_lock:
+            for found in self.__discoveries:
+                found.put(sensors)
+        self.__reconnects.found([si.Address for si in sensors])
+
+    def __stop_scan_if_idle(self):
+        with self.__discoveries_lock:
+            if len(self.__discoveries) < 1 and len(self.__reconnects.pending()) < 1 and self.__scanner is not None:
+                self.__scanner.stop()
+
+    def connect_to(self, info, need_reconnect: bool = False, **options):
+        self._deliver('connectionStateChanged', info.Address, ConnectionState.Connection)
+
+        def __device_connection():
+            try:
+                self.__add_device(info, need_reconnect, self.__create_sensor(info, options), options)
+            except Exception as err:
+                print(err)
+                self._deliver('connectionStateChanged', info.Address, ConnectionState.Error)
+
+        self._start_background(__device_connection)
+
+    def connect_many(self, infos: list, need_reconnect: bool = False, max_parallel: int = 8,
+                     timeout: float = 15.0, retries: int = 2, retry_delay: float = 1.0, **options) -> Future:
+        result = Future()
+
+        def __device_connection(info) -> ConnectResult:
+            started = time.perf_counter()
+            try:
+                return self.__connect_with_retries(info, need_reconnect, timeout, retries, retry_delay, options)
+            except Exception as err:
+                print(err)
+                return ConnectResult(address=info.Address, connected=info.Address in self._devices, attempts=1,
+                                     latency=time.perf_counter() - started, error=str(err))
+
+        def __devices_connection():
+            try:
+                started = time.perf_counter()
+                with ThreadPoolExecutor(max_workers=max(1, max_parallel)) as pool:
+                    devices = list(pool.map(__device_connection, infos))
+                connected = sum(1 for device in devices if device.connected)
+                result.set_result(ConnectManyResult(devices=devices, connected=connected,
+                                                    failed=len(devices) - connected,
+                                                    seconds=time.perf_counter() - started))
+            except Exception as err:
+                print(err)
+                result.set_exception(err)
+
+        self._start_background(__devices_connection)
+        return result
+
+    def __connect_with_retries(self, info, need_reconnect: bool, timeout: float, retries: int,
+                               retry_delay: float, options: dict) -> ConnectResult:
+        if info.Address in self._devices:
+            return ConnectResult(address=info.Address, connected=True, attempts=0, latency=0.0)
+        self._deliver('connectionStateChanged', info.Address, ConnectionState.Connection)
+        started = time.perf_counter()
+        error = None
+        for attempt in range(1, retries + 2):
+            if attempt > 1:
+                time.sleep(retry_delay)
+            future = Future()
+            Thread(target=self.__create_sensor_to, args=(info, options, future), daemon=True).start()
+            try:
+                sensor = future.result(timeout)
+            except TimeoutError:
+                future.add_done_callback(self.__discard_sensor)
+                error = "Connection to {} timed out".format(info.Address)
+                continue
+            except Exception as err:
+                error = str(err)
+                continue
+            latency = time.perf_counter() - started
+            self._latency.record(info.Address, 'connect', latency)
+            self.__add_device(info, need_reconnect, sensor, options)
+            return ConnectResult(address=info.Address, connected=True, attempts=attempt, latency=latency)
+        print(error)
+        self._deliver('connectionStateChanged', info.Address, ConnectionState.Error)
+        return ConnectResult(address=info.Address, connected=False, attempts=retries + 1,
+                             latency=time.perf_counter() - started, error=error)
+
+    def __create_sensor(self, info, options: dict) -> Sensor:
+        sensor = self.__scanner.create_sensor(info.sensor_info)
+        if sensor is None:
+            raise Exception("Failed to create sensor {}".format(info.Address))
+        self._configure_sensor(sensor, **options)
+        return sensor
+
+    def __create_sensor_to(self, info, options: dict, future: Future):
+        try:
+            future.set_result(self.__create_sensor(info, options))
+        except Exception as err:
+            future.set_exception(err)
+
+    @staticmethod
+    def __discard_sensor(future: Future):
+        if future.exception() is None:
+            future.result().disconnect()
+
+    def __add_device(self, info, need_reconnect: bool, sensor: Sensor, options: dict):
+        sensor.sensorStateChanged = self.__connection_state_changed
+        sensor.batteryChanged = self.__battery_changed
+        self._devices.update({info.Address: self._create_device(need_reconnect, sensor, **options)})
+        self.connected_devices.append(info.Address)
+        self._deliver('connectionStateChanged', info.Address, ConnectionState.Connected)
+
+    def __connection_state_changed(self, sensor: Sensor, state: SensorState):
+        self._deliver('connectionStateChanged', sensor.address,
+                      ConnectionState.Connected if state == SensorState.StateInRange else ConnectionState.Disconnected)
+        device = self._devices.get(sensor.address)
+        if state == SensorState.StateOutOfRange and device is not None:
+            if device.timeline is not None:
+                device.timeline.mark_reconnect()
+            if device.need_reconnect:
+                self.__reconnects.add(sensor.address)
+                self.__scanner.start()
+
+    def __reconnect(self, address: str) -> bool:
+        device = self._devices.get(address)
+        if device is None:
+            return True
+        if device.sensor.state != SensorState.StateInRange:
+            device.sensor.connect()
+        if device.sensor.state != SensorState.StateInRange:
+            return False
+        if device.is_signal:
+            self._execute_command(device.sensor, SensorCommand.StartSignal)
+        return True
+
+    def __recovered(self, address: str, seconds: float):
+        self._latency.record(address, 'recover', seconds)
+        self.__stop_scan_if_idle()
+
+    def reconnect_stats(self) -> dict:
+        return self.__reconnects.stats()
+
+    def __battery_changed(self, sensor: Sensor, battery: int):
+        self._deliver('batteryChanged', sensor.address, battery)
+
+    def disconnect_from(self, address: str):
+        self._deliver('connectionStateChanged', address, ConnectionState.Disconnection)
+        self.__reconnects.remove(address)
+        self.__stop_scan_if_idle()
+        device = self._devices[address]
+        self._stop_pipeline(address)
+        self.__recordings.remove(address)
+        self._latency.remove(address)
+        self._devices.pop(address)
+        self.connected_devices.remove(address)
+        device.sensor.disconnect()
+        device.sensor = None
+
+    def start_calculations(self, address: str, use_worker: bool = False, **options) -> Optional[Future]:
+        device = self._devices[address]
+        self._stop_pipeline(address)
+        self._prepare_calculations(address, device, **options)
+        device.timeline = SignalTimeline(device.sampling_rate, self.__gap_policy, self.__max_fill)
+        device.quality = self.__create_quality(device)
+        device.sensor.signalDataReceived = self.__with_recording(address, self._signal_receiver(address, use_worker))
+        future = self._execute_command(device.sensor, SensorCommand.StartSignal)
+        device.is_signal = True
+        return future
+
+    def start_calculations_many(self, addresses: List[str], use_worker: bool = False, **options) -> List[Future]:
+        return [self.start_calculations(address, use_worker, **options) for address in addresses]
+
+    def stop_calculations(self, address: str):
+        device = self._devices[address]
+        device.sensor.signalDataReceived = None
+        self._stop_pipeline(address)
+        self._execute_command(device.sensor, SensorCommand.StopSignal)
+        device.is_signal = False
+
+    def _signal_receiver(self, address: str, use_worker: bool):
+        process = self._signal_processor(address)
+        if use_worker:
+            device = self._devices[address]
+            device.pipeline = SignalPipeline(process, address=address, latency=self._latency)
+            return device.pipeline.put
+        return process
+
+    def _signal_processor(self, address: str):
+        latency = self._latency
+
+        def on_signal_received(sensor: Sensor, data: list, arrived: Optional[float] = None):
+            try:
+                started = time.perf_counter()
+                if arrived is None:
+                    arrived = started
+                else:
+                    latency.record(address, 'queue', started - arrived)
+                device = self._devices[address]
+                self._process(address, device, self._advance(address, device, data), started, arrived)
+            except Exception as err:
+                print(err)
+
+        return on_signal_received
+
+    def _advance(self, address: str, device: SensorDevice, data: list) -> np.ndarray:
+        samples, gaps = device.timeline.advance(*self._packet_samples(data))
+        if gaps:
+            if any(gap.action == GapPolicy.Reset for gap in gaps):
+                self._reset_device(address, device)
+            for gap in gaps:
+                self._deliver('signalGap', address, gap)
+        quality = device.quality
+        if quality is not None:
+            report = quality.update(samples)
+            if report is not None:
+                self._deliver('signalQualityUpdated', address, report)
+        return samples
+
+    def _stop_pipeline(self, address: str):
+        device = self._devices[address]
+        if device.pipeline is not None:
+            device.pipeline.stop()
+            device.pipeline = None
+
+    def start_recording(self, address: str, path: str):
+        self.__recordings.add(address, SignalRecorder(path, self.CHANNELS, self._devices[address].sampling_rate))
+
+    def stop_recording(self, address: str):
+        self.__recordings.remove(address)
+
+    def recording_stats(self) -> dict:
+        return self.__recordings.stats()
+
+    def add_replay_device(self, address: str, **options):
+        self._devices.update({address: self._create_device(False, ReplaySensor(address), **options)})
+        self.connected_devices.append(address)
+
+    def replay(self, address: str, path: str, speed: Optional[float] = None) -> dict:
+        sensor = self._devices[address].sensor
+        return replay_recording(path, lambda packets: sensor.signalDataReceived(sensor, packets),
+                                self._signal_packets, speed)
+
+    def __with_recording(self, address: str, deliver):
+        recordings = self.__recordings
+        signal_rows = self._signal_rows
+
+        def on_signal_received(sensor, data):
+            recorder = recordings.get(address)
+            if recorder is not None:
+                try:
+                    recorder.append(*signal_rows(data))
+                except Exception as err:
+                    print(err)
+            deliver(sensor, data)
+
+        return on_signal_received
+
+    def stats(self) -> dict:
+        return self._latency.summary()
+
+    def start_stats_dump(self, interval: float = 10.0, path: Optional[str] = None):
+        self._latency.start_dump(interval, path)
+
+    def stop_stats_dump(self):
+        self._latency.stop_dump()
+
+    def set_gap_policy(self, policy: GapPolicy, max_fill: float = 1.0):
+        self.__gap_policy = policy
+        self.__max_fill = max_fill
+
+    def timeline(self, address: str) -> Optional[dict]:
+        timeline = self._devices[address].timeline
+        return timeline.stats() if timeline is not None else None
+
+    # stamps a result with the last sample of the window it was computed from
+    def _stamp_result(self, device: SensorDevice, end_index: int) -> Tuple[int, float]:
+        index = max(end_index - 1, 0)
+        timeline = device.timeline
+        timestamp = timeline.timestamp(index) if timeline is not None and timeline.started is not None else time.time()
+        device.result_index = index
+        device.result_time = timestamp
+        return index, timestamp
+
+    # sample index and time of the latest result, valid inside the result callbacks
+    def result_time(self, address: str) -> Optional[Tuple[int, float]]:
+        device = self._devices[address]
+        return (device.result_index, device.result_time) if device.result_time is not None else None
+
+    def enable_batch_delivery(self, interval: float = 0.1):
+        if self._batcher is None:
+            self._batcher = ResultBatcher(self.BATCH_FIELDS, lambda records: self._deliver(self.BATCH_EVENT, records),
+                                          interval)
+
+    def disable_batch_delivery(self):
+        batcher = self._batcher
+        if batcher is not None:
+            self._batcher = None
+            batcher.stop()
+
+    def batch_delivery_stats(self) -> Optional[dict]:
+        return self._batcher.stats() if self._batcher is not None else None
+
+    def enable_signal_quality(self, mains: float = 50.0, interval: float = 1.0, saturation: Optional[float] = None):
+        self.__quality_settings = {'mains': mains, 'interval': interval, 'saturation': saturation}
+        for device in self._devices.values():
+            if device.is_signal:
+                device.quality = self.__create_quality(device)
+
+    def disable_signal_quality(self):
+        self.__quality_settings = None
+        for device in self._devices.values():
+            device.quality = None
+
+    def signal_quality(self, address: str) -> Optional[List[ChannelQuality]]:
+        quality = self._devices[address].quality
+        return quality.report if quality is not None else None
+
+    def __create_quality(self, device: SensorDevice) -> Optional[SignalQuality]:
+        if self.__quality_settings is None:
+            return None
+        return SignalQuality(self.CHANNEL_NAMES, device.sampling_rate, **self.__quality_settings)
+
+    def pipeline_stats(self, address: str) -> Optional[dict]:
+        pipeline = self._devices[address].pipeline
+        return pipeline.stats() if pipeline is not None else None
+
+    def _execute_command(self, sensor: Sensor, command: SensorCommand) -> Future:
+        return self.__commands.submit(sensor.address, command, lambda: sensor.exec_command(command))
+
+    def stop_all(self):
+        self.__reconnects.stop()
+        self.__scanner.stop()
+        self.__scanner.sensorsChanged = None
+        self.__scanner = None
+
+        for address, device in self._devices.items():
+            device.sensor.signalDataReceived = None
+            self._stop_pipeline(address)
+        self._shutdown()
+        self.disable_batch_delivery()
+        self.__recordings.stop()
+        self._latency.stop_dump()
+        for device in self._devices.values():
+            device.sensor.disconnect()
+            device.sensor.sensorStateChanged = None
+            device.sensor.batteryChanged = None
+            device.sensor = None
+        self._devices.clear()
+        self.connected_devices.clear()
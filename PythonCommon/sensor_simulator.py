@@ -0,0 +1,214 @@
+import random
+import time
+from dataclasses import dataclass
+from threading import Thread, Lock, Event, Timer
+from typing import List, Optional
+
+import numpy as np
+
+from neurosdk.cmn_types import SensorState, SensorCommand, CallibriSignalData, BrainBitSignalData
+
+ECG = 'ecg'
+EEG = 'eeg'
+
+
+@dataclass
+class SimulatedSensorInfo:
+    Name: str
+    Address: str
+
+
+@dataclass
+class SimulatedResistData:
+    O1: float
+    O2: float
+    T3: float
+    T4: float
+
+
+def ecg_wave(t: np.ndarray, heart_rate: float) -> np.ndarray:
+    phase = (t * heart_rate / 60.0) % 1.0
+    wave = 0.10 * np.exp(-((phase - 0.15) / 0.030) ** 2) \
+        - 0.10 * np.exp(-((phase - 0.27) / 0.008) ** 2) \
+        + 1.00 * np.exp(-((phase - 0.30) / 0.010) ** 2) \
+        - 0.20 * np.exp(-((phase - 0.33) / 0.010) ** 2) \
+        + 0.25 * np.exp(-((phase - 0.55) / 0.050) ** 2)
+    return wave * 1e-3
+
+
+def eeg_wave(t: np.ndarray, phases: np.ndarray, noise: np.ndarray) -> np.ndarray:
+    alpha = 20e-6 * np.sin(2 * np.pi * 10.0 * t[:, None] + phases[None, :])
+    beta = 5e-6 * np.sin(2 * np.pi * 20.0 * t[:, None] + 2 * phases[None, :])
+    return alpha + beta + noise
+
+
+class SimulatedSensor:
+    def __init__(self, info: SimulatedSensorInfo, kind: str, sampling_rate: int, packet_size: int, seed: int):
+        self.name = info.Name
+        self.address = info.Address
+        self.kind = kind
+        self.state = SensorState.StateInRange
+        self.signal_type = None
+        self.sampling_frequency = None
+        self.hardware_filters = []
+        self.signalDataReceived = None
+        self.resistDataReceived = None
+        self.sensorStateChanged = None
+        self.batteryChanged = None
+        self.battery = 100
+        self.__sampling_rate = sampling_rate
+        self.__packet_size = packet_size
+        self.__rng = np.random.default_rng(seed)
+        self.__heart_rate = self.__rng.uniform(55, 95)
+        self.__phases = self.__rng.uniform(0, 2 * np.pi, 4)
+        self.__is_signal = False
+        self.__is_resist = False
+        self.__started = 0.0
+        self.__generated = 0
+        self.__pack_num = 0
+        self.__artifact_until = 0.0
+        self.__last_resist = 0.0
+
+    def exec_command(self, command: SensorCommand):
+        if self.state != SensorState.StateInRange:
+            raise Exception("Sensor {} is out of range".format(self.address))
+        if command == SensorCommand.StartSignal:
+            self.__started = time.perf_counter()
+            self.__generated = 0
+            self.__is_signal = True
+        elif command == SensorCommand.StopSignal:
+            self.__is_signal = False
+        elif command == SensorCommand.StartResist:
+            self.__is_resist = True
+        elif command == SensorCommand.StopResist:
+            self.__is_resist = False
+
+    def connect(self):
+        if self.state != SensorState.StateInRange:
+            self.state = SensorState.StateInRange
+            if self.sensorStateChanged is not None:
+                self.sensorStateChanged(self, self.state)
+
+    def disconnect(self):
+        self.__is_signal = False
+        self.__is_resist = False
+        self.state = SensorState.StateOutOfRange
+
+    def lose_connection(self):
+        self.disconnect()
+        if self.sensorStateChanged is not None:
+            self.sensorStateChanged(self, self.state)
+
+    def inject_artifact(self, seconds: float):
+        self.__artifact_until = time.perf_counter() + seconds
+
+    def set_battery(self, battery: int):
+        self.battery = battery
+        if self.batteryChanged is not None:
+            self.batteryChanged(self, battery)
+
+    def tick(self, now: float):
+        if self.__is_signal:
+            due = int((now - self.__started) * self.__sampling_rate)
+            while due - self.__generated >= self.__packet_size:
+                self.__emit_signal(now)
+        if self.__is_resist and now - self.__last_resist >= 0.2:
+            self.__last_resist = now
+            callback = self.resistDataReceived
+            if callback is not None:
+                bad = now < self.__artifact_until
+                callback(self, SimulatedResistData(*self.__rng.uniform(3e6, 5e6, 4) if bad else
+                                                   self.__rng.uniform(2e5, 1.5e6, 4)))
+
+    def __emit_signal(self, now: float):
+        count = self.__packet_size
+        t = (self.__generated + np.arange(count)) / self.__sampling_rate
+        self.__generated += count
+        noise = self.__rng.standard_normal(count if self.kind == ECG else (count, 4))
+        artifact = 1e-3 if now < self.__artifact_until else 0.0
+        if self.kind == ECG:
+            samples = ecg_wave(t, self.__heart_rate) + noise * (20e-6 + artifact)
+            packets = [CallibriSignalData(PackNum=self.__pack_num, Samples=samples.tolist())]
+            self.__pack_num += 1
+        else:
+            samples = eeg_wave(t, self.__phases, noise * (3e-6 + artifact))
+            packets = []
+            for o1, o2, t3, t4 in samples.tolist():
+                packets.append(BrainBitSignalData(PackNum=self.__pack_num, Marker=0, O1=o1, O2=o2, T3=t3, T4=t4))
+                self.__pack_num += 1
+        callback = self.signalDataReceived
+        if callback is not None:
+            callback(self, packets)
+
+
+class SimulatedScanner:
+    def __init__(self, count: int = 10, kind: str = ECG, sampling_rate: Optional[int] = None,
+                 packet_size: Optional[int] = None, disconnect_rate: float = 0.0, artifact_rate: float = 0.0,
+                 battery_interval: float = 60.0, tick: float = 0.005, seed: Optional[int] = None):
+        self.sensorsChanged = None
+        self.__kind = kind
+        self.__sampling_rate = sampling_rate or (1000 if kind == ECG else 250)
+        self.__packet_size = packet_size or (10 if kind == ECG else 5)
+        self.__disconnect_rate = disconnect_rate
+        self.__artifact_rate = artifact_rate
+        self.__battery_interval = battery_interval
+        self.__tick = tick
+        self.__rng = random.Random(seed)
+        prefix = "Callibri" if kind == ECG else "BrainBit"
+        self.__infos = [SimulatedSensorInfo(Name="{} sim {}".format(prefix, index),
+                                            Address="SIM:{:02X}:{:02X}".format(index // 256, index % 256))
+                        for index in range(count)]
+        self.__sensors = {}
+        self.__lock = Lock()
+        self.__stopped = Event()
+        self.__thread = Thread(target=self.__run, daemon=True)
+        self.__thread.start()
+
+    def start(self):
+        Timer(0.05, self.__notify).start()
+
+    def stop(self):
+        pass
+
+    def sensors(self) -> List[SimulatedSensorInfo]:
+        return list(self.__infos)
+
+    def create_sensor(self, info: SimulatedSensorInfo) -> SimulatedSensor:
+        sensor = SimulatedSensor(info, self.__kind, self.__sampling_rate, self.__packet_size,
+                                 self.__rng.getrandbits(32))
+        with self.__lock:
+            self.__sensors[info.Address] = sensor
+        return sensor
+
+    def simulated_sensors(self) -> List[SimulatedSensor]:
+        with self.__lock:
+            return list(self.__sensors.values())
+
+    def shutdown(self):
+        self.__stopped.set()
+
+    def __notify(self):
+        callback = self.sensorsChanged
+        if callback is not None:
+            callback(self, self.sensors())
+
+    def __run(self):
+        last_battery = time.perf_counter()
+        while not self.__stopped.wait(self.__tick):
+            now = time.perf_counter()
+            for sensor in self.simulated_sensors():
+                try:
+                    if sensor.state == SensorState.StateInRange:
+                        if self.__rng.random() < self.__disconnect_rate * self.__tick:
+                            sensor.lose_connection()
+                            continue
+                        if self.__rng.random() < self.__artifact_rate * self.__tick:
+                            sensor.inject_artifact(0.5)
+                        sensor.tick(now)
+                except Exception as err:
+                    print(err)
+            if now - last_battery >= self.__battery_interval:
+                last_battery = now
+                for sensor in self.simulated_sensors():
+                    if sensor.state == SensorState.StateInRange:
+                        sensor.set_battery(max(0, sensor.battery - 1))
@@ -0,0 +1,93 @@
+import math
+from dataclasses import dataclass
+from typing import List, Optional
+
+import numpy as np
+
+
+@dataclass
+class ChannelQuality:
+    channel: str
+    variance: float
+    line_noise: float
+    saturation: float
+    flatline: float
+    score: float
+
+
+class SignalQuality:
+    def __init__(self, channels: List[str], sampling_rate: float, mains: float = 50.0, interval: float = 1.0,
+                 saturation: Optional[float] = None, flat_epsilon: float = 1e-9):
+        count = len(channels)
+        self.channels = channels
+        self.report: Optional[List[ChannelQuality]] = None
+        self.__omega = 2 * math.pi * mains / sampling_rate
+        self.__interval = max(1, int(interval * sampling_rate))
+        self.__saturation = saturation
+        self.__flat_epsilon = flat_epsilon
+        self.__phase = 0.0
+        self.__baseline: Optional[np.ndarray] = None
+        self.__last: Optional[np.ndarray] = None
+        self.__peak = np.zeros(count)
+        self.__reset(count)
+
+    def __reset(self, count: int):
+        self.__count = 0
+        self.__sum = np.zeros(count)
+        self.__square = np.zeros(count)
+        self.__cos = np.zeros(count)
+        self.__sin = np.zeros(count)
+        self.__flat = np.zeros(count)
+        self.__saturated = np.zeros(count)
+
+    # one pass over the new samples, a report is returned once per interval
+    def update(self, samples: np.ndarray) -> Optional[List[ChannelQuality]]:
+        values = np.asarray(samples, dtype=np.float64).reshape(len(samples), -1)
+        count = len(values)
+        if count < 1:
+            return None
+        first = self.__baseline is None
+        if first:
+            self.__baseline = values[0].copy()
+            self.__last = values[0].copy()
+        phases = self.__phase + self.__omega * np.arange(count)
+        self.__phase = (self.__phase + self.__omega * count) % (2 * math.pi)
+        centered = values - self.__baseline
+        self.__cos += np.cos(phases) @ centered
+        self.__sin += np.sin(phases) @ centered
+        self.__sum += centered.sum(axis=0)
+        self.__square += np.einsum('ij,ij->j', centered, centered)
+        flat = np.abs(np.diff(values, axis=0, prepend=self.__last[None, :])) <= self.__flat_epsilon
+        if first:
+            # the very first sample has nothing to be compared with
+            flat[0] = False
+        self.__flat += flat.sum(axis=0)
+        magnitude = np.abs(values)
+        if self.__saturation is not None:
+            self.__saturated += (magnitude >= self.__saturation).sum(axis=0)
+        else:
+            np.maximum(self.__peak, magnitude.max(axis=0), out=self.__peak)
+            self.__saturated += (flat & (self.__peak > 0) & (magnitude >= 0.99 * self.__peak)).sum(axis=0)
+        self.__last = values[-1].copy()
+        self.__count += count
+        if self.__count < self.__interval:
+            return None
+        return self.__complete()
+
+    def __complete(self) -> List[ChannelQuality]:
+        count = self.__count
+        mean = self.__sum / count
+        variance = np.maximum(self.__square / count - mean * mean, 0.0)
+        line = 2 * (self.__cos * self.__cos + self.__sin * self.__sin) / (count * count)
+        line_noise = np.minimum(np.divide(line, variance, out=np.zeros_like(line), where=variance > 0), 1.0)
+        saturation = self.__saturated / count
+        flatline = self.__flat / count
+        score = (1 - saturation) * (1 - flatline) * (1 - line_noise)
+        self.report = [ChannelQuality(channel=channel, variance=float(variance[index]),
+                                      line_noise=float(line_noise[index]), saturation=float(saturation[index]),
+                                      flatline=float(flatline[index]), score=float(score[index]))
+                       for index, channel in enumerate(self.channels)]
+        self.__baseline = self.__baseline + mean
+        self.__peak *= 0.99
+        self.__reset(len(self.channels))
+        return self.report
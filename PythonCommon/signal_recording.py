@@ -0,0 +1,162 @@
+import os
+import struct
+import time
+from collections import deque
+from threading import Thread, Lock, Event
+from typing import Optional, Tuple
+
+import numpy as np
+
+MAGIC = b'NBSIGNAL'
+VERSION = 1
+HEADER = struct.Struct('<8sIId')
+HEADER_SIZE = 64
+
+
+def row_dtype(channels: int) -> np.dtype:
+    return np.dtype([('pack_num', '<u4'), ('timestamp', '<f8'), ('samples', '<f8', (channels,))])
+
+
+class SignalRecorder:
+    def __init__(self, path: str, channels: int, sampling_rate: float):
+        self.path = path
+        self.channels = channels
+        self.sampling_rate = sampling_rate
+        self.dtype = row_dtype(channels)
+        self.__file = open(path, 'wb')
+        self.__file.write(HEADER.pack(MAGIC, VERSION, channels, sampling_rate).ljust(HEADER_SIZE, b'\0'))
+        self.__chunks = deque()
+        self.__lock = Lock()
+        self.rows = 0
+        self.bytes = HEADER_SIZE
+
+    def append(self, pack_nums: np.ndarray, samples: np.ndarray):
+        rows = np.empty(len(samples), dtype=self.dtype)
+        rows['pack_num'] = pack_nums
+        rows['timestamp'] = time.time()
+        rows['samples'] = samples.reshape(len(samples), self.channels)
+        self.__chunks.append(rows)
+
+    def flush(self):
+        with self.__lock:
+            if self.__file is None or not self.__chunks:
+                return
+            chunks = [self.__chunks.popleft() for _ in range(len(self.__chunks))]
+            rows = np.concatenate(chunks)
+            self.__file.write(rows.tobytes())
+            self.__file.flush()
+            self.rows += len(rows)
+            self.bytes += rows.nbytes
+
+    def close(self):
+        self.flush()
+        with self.__lock:
+            if self.__file is not None:
+                self.__file.close()
+                self.__file = None
+
+
+class RecordingWriter:
+    def __init__(self, flush_interval: float = 0.5):
+        self.__flush_interval = flush_interval
+        self.__recorders = {}
+        self.__lock = Lock()
+        self.__stopped = Event()
+        self.__thread = Thread(target=self.__run, daemon=True)
+        self.__thread.start()
+
+    def add(self, address: str, recorder: SignalRecorder):
+        self.remove(address)
+        with self.__lock:
+            self.__recorders[address] = recorder
+
+    def get(self, address: str) -> Optional[SignalRecorder]:
+        return self.__recorders.get(address)
+
+    def remove(self, address: str):
+        with self.__lock:
+            recorder = self.__recorders.pop(address, None)
+        if recorder is not None:
+            recorder.close()
+
+    def __run(self):
+        while not self.__stopped.wait(self.__flush_interval):
+            with self.__lock:
+                recorders = list(self.__recorders.values())
+            for recorder in recorders:
+                try:
+                    recorder.flush()
+                except Exception as err:
+                    print(err)
+
+    def stats(self) -> dict:
+        with self.__lock:
+            return {address: {'path': recorder.path, 'rows': recorder.rows, 'bytes': recorder.bytes}
+                    for address, recorder in self.__recorders.items()}
+
+    def stop(self):
+        self.__stopped.set()
+        self.__thread.join()
+        for address in list(self.__recorders.keys()):
+            self.remove(address)
+
+
+def open_recording(path: str) -> Tuple[dict, np.ndarray]:
+    with open(path, 'rb') as file:
+        header = file.read(HEADER_SIZE)
+    magic, version, channels, sampling_rate = HEADER.unpack_from(header)
+    if magic != MAGIC:
+        raise ValueError("{} is not a signal recording".format(path))
+    dtype = row_dtype(channels)
+    # a crash or a full disk can leave a partial row at the end, it is skipped
+    count, truncated = divmod(max(0, os.path.getsize(path) - HEADER_SIZE), dtype.itemsize)
+    info = {'version': version, 'channels': channels, 'sampling_rate': sampling_rate, 'truncated': truncated}
+    if count > 0:
+        rows = np.memmap(path, dtype=dtype, mode='r', offset=HEADER_SIZE, shape=(count,))
+    else:
+        rows = np.empty(0, dtype=dtype)
+    return info, rows
+
+
+class ReplaySensor:
+    def __init__(self, address: str, name: str = "Replay"):
+        self.address = address
+        self.name = name
+        self.signalDataReceived = None
+        self.resistDataReceived = None
+        self.sensorStateChanged = None
+        self.batteryChanged = None
+
+    def exec_command(self, command):
+        pass
+
+    def connect(self):
+        pass
+
+    def disconnect(self):
+        pass
+
+
+def replay_recording(path: str, deliver, make_packets, speed: Optional[float] = None,
+                     chunk_rows: int = 1 << 16) -> dict:
+    info, rows = open_recording(path)
+    started = time.perf_counter()
+    first_timestamp = float(rows['timestamp'][0]) if len(rows) > 0 else 0.0
+    callbacks = 0
+    pending = rows[:0]
+    for offset in range(0, len(rows), chunk_rows):
+        chunk = np.concatenate((pending, rows[offset:offset + chunk_rows]))
+        groups = np.split(chunk, np.flatnonzero(np.diff(chunk['timestamp'])) + 1)
+        pending = groups.pop() if offset + chunk_rows < len(rows) else chunk[:0]
+        for group in groups:
+            if speed is not None:
+                delay = (group['timestamp'][0] - first_timestamp) / speed - (time.perf_counter() - started)
+                if delay > 0:
+                    time.sleep(delay)
+            deliver(make_packets(group))
+            callbacks += 1
+    elapsed = time.perf_counter() - started
+    return {'samples': len(rows),
+            'callbacks': callbacks,
+            'seconds': elapsed,
+            'samples_per_sec': len(rows) / elapsed if elapsed > 0 else 0.0}
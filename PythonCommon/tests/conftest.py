@@ -0,0 +1,6 @@
+import os
+import sys
+
+COMMON_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if COMMON_PATH not in sys.path:
+    sys.path.insert(0, COMMON_PATH)
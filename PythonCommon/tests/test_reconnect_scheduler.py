@@ -0,0 +1,59 @@
+import time
+
+import pytest
+
+pytest.importorskip("neurosdk")
+
+from sensor_core import ReconnectScheduler
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.perf_counter() + timeout
+    while not condition():
+        if time.perf_counter() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_waits_for_the_scanner_before_connecting():
+    attempts = []
+    recovered = []
+    scheduler = ReconnectScheduler(lambda address: attempts.append(address) or True,
+                                   lambda address, seconds: recovered.append(address), max_delay=30.0)
+    try:
+        scheduler.add("A")
+        time.sleep(0.2)
+        assert attempts == []
+        scheduler.found(["A"])
+        assert wait_for(lambda: recovered == ["A"])
+        assert attempts == ["A"]
+        assert scheduler.pending() == []
+    finally:
+        scheduler.stop()
+
+
+def test_unseen_device_gets_a_blind_attempt_after_max_delay():
+    attempts = []
+    scheduler = ReconnectScheduler(lambda address: attempts.append(address) or False, max_delay=0.2)
+    try:
+        scheduler.add("A")
+        assert wait_for(lambda: len(attempts) >= 1)
+        assert scheduler.stats()['pending']['A']['attempts'] >= 1
+    finally:
+        scheduler.stop()
+
+
+def test_failed_attempt_backs_off():
+    attempts = []
+    scheduler = ReconnectScheduler(lambda address: attempts.append(time.monotonic()) or False,
+                                   base_delay=0.3, max_delay=30.0)
+    try:
+        scheduler.add("A")
+        scheduler.found(["A"])
+        assert wait_for(lambda: len(attempts) == 1)
+        scheduler.found(["A"])
+        assert wait_for(lambda: len(attempts) == 2)
+        assert attempts[1] - attempts[0] >= 0.15
+    finally:
+        scheduler.stop()
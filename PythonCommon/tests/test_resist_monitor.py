@@ -0,0 +1,25 @@
+from resist_monitor import ResistMonitor
+
+
+def test_reports_only_changes():
+    monitor = ResistMonitor(2, threshold=100.0, window=1)
+    assert monitor.update([10.0, 200.0]) == (False, True)
+    assert monitor.update([20.0, 300.0]) is None
+    assert monitor.update([20.0, 50.0]) == (False, False)
+
+
+def test_hysteresis_keeps_bad_state_near_threshold():
+    monitor = ResistMonitor(1, threshold=100.0, hysteresis=0.1, window=1)
+    assert monitor.update([150.0]) == (True,)
+    assert monitor.update([95.0]) is None
+    assert monitor.update([89.0]) == (False,)
+    assert monitor.update([99.0]) is None
+    assert monitor.update([100.0]) == (True,)
+
+
+def test_median_window_ignores_single_spike():
+    monitor = ResistMonitor(1, threshold=100.0, window=3)
+    assert monitor.update([10.0]) == (False,)
+    monitor.update([10.0])
+    assert monitor.update([1000.0]) is None
+    assert monitor.levels[0] == 10.0
@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("neurosdk")
+pytest.importorskip("callibri_ecg")
+
+from callibri_core import SignalRingBuffer
+
+
+def test_windows_are_read_in_order():
+    buffer = SignalRingBuffer(8)
+    buffer.extend([1, 2, 3])
+    assert buffer.read(4) is None
+    buffer.extend([4, 5])
+    np.testing.assert_array_equal(buffer.read(4), [1, 2, 3, 4])
+    assert len(buffer) == 1
+
+
+def test_overflow_drops_oldest_samples():
+    buffer = SignalRingBuffer(6)
+    buffer.extend([1, 2, 3, 4])
+    buffer.extend([5, 6, 7, 8])
+    assert buffer.dropped == 2
+    assert len(buffer) == 6
+    np.testing.assert_array_equal(buffer.read(6), [3, 4, 5, 6, 7, 8])
+
+
+def test_packet_larger_than_capacity_keeps_its_tail():
+    buffer = SignalRingBuffer(4)
+    buffer.extend([1, 2])
+    buffer.extend(np.arange(10, 16))
+    assert buffer.dropped == 4
+    np.testing.assert_array_equal(buffer.read(4), [12, 13, 14, 15])
+
+
+def test_compaction_keeps_unread_samples():
+    buffer = SignalRingBuffer(6)
+    buffer.extend([1, 2, 3, 4, 5])
+    buffer.read(4)
+    buffer.extend([6, 7, 8])
+    assert buffer.dropped == 0
+    np.testing.assert_array_equal(buffer.read(4), [5, 6, 7, 8])
@@ -0,0 +1,55 @@
+import numpy as np
+
+from signal_recording import SignalRecorder, RecordingWriter, open_recording, replay_recording
+
+
+def record(path, chunks, channels=2):
+    recorder = SignalRecorder(path, channels, 250.0)
+    for pack_nums, samples in chunks:
+        recorder.append(np.asarray(pack_nums), np.asarray(samples, dtype=np.float64))
+    recorder.close()
+    return recorder
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / "signal.bin")
+    first = np.arange(6, dtype=np.float64).reshape(3, 2)
+    second = np.arange(6, 10, dtype=np.float64).reshape(2, 2)
+    recorder = record(path, [([0, 1, 2], first), ([3, 4], second)])
+    info, rows = open_recording(path)
+    assert info['channels'] == 2
+    assert info['sampling_rate'] == 250.0
+    assert info['truncated'] == 0
+    assert recorder.rows == len(rows) == 5
+    np.testing.assert_array_equal(rows['pack_num'], [0, 1, 2, 3, 4])
+    np.testing.assert_array_equal(rows['samples'], np.concatenate((first, second)))
+
+
+def test_partial_trailing_row_is_skipped(tmp_path):
+    path = str(tmp_path / "signal.bin")
+    record(path, [([0, 1], np.zeros((2, 2)))])
+    with open(path, 'ab') as file:
+        file.write(b'\1\2\3')
+    info, rows = open_recording(path)
+    assert len(rows) == 2
+    assert info['truncated'] == 3
+
+
+def test_replay_delivers_every_recorded_callback(tmp_path):
+    path = str(tmp_path / "signal.bin")
+    record(path, [([0, 1], np.zeros((2, 2))), ([2, 3, 4], np.ones((3, 2)))])
+    delivered = []
+    stats = replay_recording(path, delivered.append, lambda group: group['pack_num'].tolist(), chunk_rows=2)
+    assert stats['samples'] == 5
+    assert sum(delivered, []) == [0, 1, 2, 3, 4]
+
+
+def test_writer_flushes_on_stop(tmp_path):
+    path = str(tmp_path / "signal.bin")
+    writer = RecordingWriter(flush_interval=10.0)
+    recorder = SignalRecorder(path, 1, 1000.0)
+    writer.add("A", recorder)
+    recorder.append(np.arange(3), np.ones(3))
+    writer.stop()
+    info, rows = open_recording(path)
+    assert len(rows) == 3
@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("neurosdk")
+
+from sensor_core import GapPolicy, SignalTimeline
+
+
+def advance(timeline, pack_nums, samples=None, counts=None):
+    pack_nums = np.asarray(pack_nums)
+    if samples is None:
+        samples = np.arange(len(pack_nums) if counts is None else int(np.sum(counts)), dtype=np.float64)
+    return timeline.advance(pack_nums, np.asarray(samples, dtype=np.float64),
+                            None if counts is None else np.asarray(counts))
+
+
+def test_continuous_packets_have_no_gaps():
+    timeline = SignalTimeline(250)
+    advance(timeline, [10, 11, 12])
+    samples, gaps = advance(timeline, [13, 14])
+    assert gaps == []
+    assert timeline.sample_index == 5
+    assert timeline.lost_samples == 0
+
+
+def test_forward_jump_is_a_gap():
+    timeline = SignalTimeline(250)
+    advance(timeline, [0, 1, 2])
+    samples, gaps = advance(timeline, [5, 6])
+    assert len(gaps) == 1
+    assert gaps[0].sample_index == 3
+    assert gaps[0].missing == 2
+    assert gaps[0].action == GapPolicy.Ignore
+    assert timeline.sample_index == 7
+    assert timeline.lost_samples == 2
+
+
+def test_gap_counts_samples_of_multi_sample_packets():
+    timeline = SignalTimeline(1000)
+    advance(timeline, [0, 1], counts=[10, 10])
+    samples, gaps = advance(timeline, [3], counts=[10])
+    assert gaps[0].missing == 10
+    assert timeline.sample_index == 40
+
+
+def test_repeated_packet_and_counter_wrap_are_not_gaps():
+    timeline = SignalTimeline(250)
+    advance(timeline, [65534, 65535])
+    samples, gaps = advance(timeline, [65535, 0, 1])
+    assert gaps == []
+    assert timeline.gaps == 0
+
+
+def test_counter_restart_after_reconnect():
+    timeline = SignalTimeline(250)
+    advance(timeline, [100, 101])
+    timeline.mark_reconnect()
+    samples, gaps = advance(timeline, [0, 1])
+    assert len(gaps) == 1
+    assert gaps[0].missing == 0
+    samples, gaps = advance(timeline, [0])
+    assert gaps == []
+
+
+def test_fill_policy_interpolates_missing_samples():
+    timeline = SignalTimeline(250, GapPolicy.Fill)
+    advance(timeline, [0, 1], [0.0, 1.0])
+    samples, gaps = advance(timeline, [4, 5], [4.0, 5.0])
+    assert gaps[0].action == GapPolicy.Fill
+    np.testing.assert_allclose(samples, [2.0, 3.0, 4.0, 5.0])
+    assert timeline.sample_index == 6
+    assert timeline.filled_samples == 2
+
+
+def test_long_gap_is_reset_instead_of_filled():
+    timeline = SignalTimeline(250, GapPolicy.Fill, max_fill=0.01)
+    advance(timeline, [0, 1])
+    samples, gaps = advance(timeline, [100])
+    assert gaps[0].action == GapPolicy.Reset
+    assert len(samples) == 1
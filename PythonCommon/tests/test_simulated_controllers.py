@@ -0,0 +1,146 @@
+import time
+from threading import Event
+
+import pytest
+
+pytest.importorskip("neurosdk")
+
+from sensor_core import CallbackDelivery
+from sensor_simulator import SimulatedScanner, ECG, EEG
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.perf_counter() + timeout
+    while not condition():
+        if time.perf_counter() > deadline:
+            return False
+        time.sleep(0.02)
+    return True
+
+
+def connect_all(controller):
+    founded = Event()
+    sensors = []
+
+    def on_founded(infos):
+        sensors.extend(infos)
+        founded.set()
+
+    setattr(controller, controller.FOUND_EVENT, on_founded)
+    controller.search_with_result(1, [])
+    assert founded.wait(5)
+    report = controller.connect_many(sensors).result(timeout=10)
+    assert report.failed == 0
+    return [info.Address for info in sensors]
+
+
+@pytest.fixture
+def callibri():
+    pytest.importorskip("callibri_ecg")
+    from callibri_core import CallibriCore
+
+    class Controller(CallbackDelivery, CallibriCore):
+        connectionStateChanged = None
+        signalGap = None
+        signalQualityUpdated = None
+        batteryChanged = None
+        hrValuesUpdated = None
+        hrValuesBatch = None
+        hasRRPicks = None
+        foundedDevices = None
+        deviceFounded = None
+
+    scanner = SimulatedScanner(2, ECG, seed=1)
+    controller = Controller(scanner)
+    yield controller
+    controller.stop_all()
+    scanner.shutdown()
+
+
+@pytest.fixture
+def brainbit():
+    pytest.importorskip("em_st_artifacts")
+    from brainbit_core import BrainBitCore
+
+    class Controller(CallbackDelivery, BrainBitCore):
+        connectionStateChanged = None
+        signalGap = None
+        signalQualityUpdated = None
+        batteryChanged = None
+        resistValuesUpdated = None
+        mindDataUpdated = None
+        mindDataBatch = None
+        isArtefacted = None
+        calibrationProcessChanged = None
+        calibrationFinished = None
+        founded = None
+        deviceFounded = None
+
+    scanner = SimulatedScanner(1, EEG, seed=1)
+    controller = Controller(scanner)
+    yield controller, scanner
+    controller.stop_all()
+    scanner.shutdown()
+
+
+def test_callibri_processes_simulated_signal(callibri):
+    addresses = connect_all(callibri)
+    windows = []
+    callibri.hasRRPicks = lambda address, has_picks: windows.append(address)
+    callibri.start_calculations_many(addresses)
+    assert wait_for(lambda: set(windows) == set(addresses))
+    for address in addresses:
+        timeline = callibri.timeline(address)
+        assert timeline['sample_index'] > 0
+        assert timeline['gaps'] == 0
+
+
+def test_callibri_results_are_stamped_with_sample_time(callibri):
+    address = connect_all(callibri)[0]
+    stamps = []
+    callibri.hasRRPicks = lambda address, has_picks: stamps.append(callibri.result_time(address))
+    callibri.start_calculations(address)
+    assert wait_for(lambda: len(stamps) >= 3)
+    from callibri_core import DEFAULT_PROFILE
+    buf_size = DEFAULT_PROFILE.chunk_size
+    assert [index for index, _ in stamps[:3]] == [buf_size - 1, 2 * buf_size - 1, 3 * buf_size - 1]
+    assert stamps[1][1] - stamps[0][1] == pytest.approx(buf_size / DEFAULT_PROFILE.sampling_rate)
+
+
+def test_brainbit_resist_follows_artifacts(brainbit):
+    from brainbit_core import ResistState, ResistValues
+    normal = ResistValues(*[ResistState.Normal] * 4)
+    bad = ResistValues(*[ResistState.Bad] * 4)
+    controller, scanner = brainbit
+    address = connect_all(controller)[0]
+    updates = []
+    controller.resistValuesUpdated = lambda address, values: updates.append(values)
+    controller.set_resist_settings(threshold=2500000.0, hysteresis=0.1, window=1)
+    controller.start_resist(address)
+    assert wait_for(lambda: len(updates) == 1)
+    assert updates[0] == normal
+    scanner.simulated_sensors()[0].inject_artifact(0.6)
+    assert wait_for(lambda: len(updates) == 3)
+    assert updates[1:] == [bad, normal]
+
+
+def test_async_facade_forwards_batches_per_address(callibri):
+    import asyncio
+    from async_controller import AsyncController
+
+    addresses = connect_all(callibri)
+    callibri.enable_batch_delivery(0.05)
+
+    async def first_batch():
+        facade = AsyncController(callibri)
+        try:
+            async with facade.subscribe(addresses=addresses[:1], events=['hr_batch']) as stream:
+                callibri.start_calculations_many(addresses)
+                return await asyncio.wait_for(stream.__anext__(), 5)
+        finally:
+            facade.close()
+
+    event = asyncio.run(first_batch())
+    assert event.address == addresses[0]
+    assert set(event.value['address'].tolist()) == {addresses[0]}
+    assert callibri.hrValuesBatch is None
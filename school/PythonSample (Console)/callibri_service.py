@@ -0,0 +1,54 @@
+import argparse
+import asyncio
+
+import common_path
+from callibri_ecg_console_demo import CallibriController, ECG_PROFILES
+from result_service import ResultService
+
+
+async def main(args):
+    service = ResultService(args.host, args.port, args.unix, args.max_events)
+    await service.start()
+
+    scanner = None
+    if args.simulate > 0:
+        from sensor_simulator import SimulatedScanner, ECG
+        scanner = SimulatedScanner(args.simulate, ECG, sampling_rate=ECG_PROFILES[args.profile].sampling_rate)
+    controller = CallibriController(scanner)
+    controller.connectionStateChanged = lambda address, state: service.publish(address, 'state', state)
+    controller.batteryChanged = lambda address, battery: service.publish(address, 'battery', battery)
+    controller.signalGap = lambda address, gap: service.publish(address, 'gap', gap)
+    controller.signalQualityUpdated = lambda address, quality: service.publish(address, 'quality', quality)
+    controller.enable_signal_quality(args.mains)
+    controller.hrValuesUpdated = lambda address, hr: service.publish(address, 'hr', hr)
+    controller.hasRRPicks = lambda address, has_picks: service.publish(address, 'rr', has_picks)
+
+    try:
+        infos = await asyncio.to_thread(lambda: list(controller.discover(args.search, args.addresses)))
+        report = await asyncio.wrap_future(controller.connect_many(infos, need_reconnect=True,
+                                                                    profile=ECG_PROFILES[args.profile]))
+        print("Подключено девайсов: {}, ошибок: {}".format(report.connected, report.failed))
+        controller.start_calculations_many(list(controller.connected_devices), use_worker=True)
+        await service.serve_forever()
+    finally:
+        controller.stop_all()
+        await service.stop()
+        if scanner is not None:
+            scanner.shutdown()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Callibri headless service streaming HR results over a socket")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", default=None, help="serve on a unix socket path instead of TCP")
+    parser.add_argument("--max-events", type=int, default=1024, help="queue length per subscriber")
+    parser.add_argument("--search", type=float, default=5.0)
+    parser.add_argument("--addresses", nargs="*", default=[])
+    parser.add_argument("--profile", choices=list(ECG_PROFILES.keys()), default="default")
+    parser.add_argument("--mains", type=float, default=50.0, help="power line frequency for the quality index")
+    parser.add_argument("--simulate", type=int, default=0, help="number of simulated sensors instead of real ones")
+    try:
+        asyncio.run(main(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
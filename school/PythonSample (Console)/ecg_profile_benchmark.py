@@ -0,0 +1,51 @@
+import argparse
+import time
+
+import numpy as np
+
+from callibri_ecg.callibri_ecg_lib import CallibriMath
+
+import common_path
+from callibri_core import ECG_PROFILES, EcgProfile
+from sensor_simulator import ecg_wave
+
+
+def run_profile(profile: EcgProfile, seconds: int) -> dict:
+    rng = np.random.default_rng(1)
+    t = np.arange(seconds * profile.sampling_rate) / profile.sampling_rate
+    signal = ecg_wave(t, 72.0) + rng.standard_normal(len(t)) * 20e-6
+    math = CallibriMath(profile.sampling_rate, profile.data_window, profile.nwins)
+    math.init_filter()
+    chunks = range(0, len(signal) - profile.chunk_size + 1, profile.chunk_size)
+    durations = np.empty(len(chunks))
+    updates = 0
+    cpu_started = time.process_time()
+    for index, offset in enumerate(chunks):
+        started = time.perf_counter()
+        math.push_data(signal[offset:offset + profile.chunk_size])
+        math.process_data_arr()
+        if math.rr_detected():
+            math.get_hr()
+            updates += 1
+        durations[index] = time.perf_counter() - started
+    cpu = time.process_time() - cpu_started
+    hop = profile.chunk_size / profile.sampling_rate
+    return {'cpu_per_second': cpu / seconds,
+            'updates_per_second': updates / seconds,
+            'latency_mean': hop + durations.mean(),
+            'latency_max': hop + durations.max()}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="CPU cost and HR update latency of ECG profiles")
+    parser.add_argument("--seconds", type=int, default=300)
+    args = parser.parse_args()
+
+    for name, profile in ECG_PROFILES.items():
+        result = run_profile(profile, args.seconds)
+        print("{}: {} Hz, window {}, nwins {}, chunk {}".format(name, profile.sampling_rate, profile.data_window,
+                                                                profile.nwins, profile.chunk_size))
+        print("  CPU: {:.2f} ms per signal second ({:.3f}% of a core), HR updates: {:.1f}/sec".format(
+            1000 * result['cpu_per_second'], 100 * result['cpu_per_second'], result['updates_per_second']))
+        print("  update latency: {:.1f} ms mean, {:.1f} ms max".format(1000 * result['latency_mean'],
+                                                                      1000 * result['latency_max']))
@@ -0,0 +1,55 @@
+import queue
+import time
+from itertools import chain
+
+import numpy as np
+
+import common_path
+from callibri_core import SignalRingBuffer
+
+SAMPLING_RATE = 1000
+PACKET_SIZE = 10
+PACKETS_PER_CALLBACK = 2
+BUF_SIZE = int(SAMPLING_RATE / 10)
+SECONDS = 600
+
+
+class FakeSignalData:
+    def __init__(self, samples):
+        self.Samples = samples
+
+
+def make_callbacks():
+    samples = np.sin(np.linspace(0, 2 * np.pi, PACKET_SIZE)).tolist()
+    data = [FakeSignalData(samples) for _ in range(PACKETS_PER_CALLBACK)]
+    count = SECONDS * SAMPLING_RATE // (PACKET_SIZE * PACKETS_PER_CALLBACK)
+    return [data] * count
+
+
+def run_queue(callbacks):
+    buffer = queue.Queue()
+    for data in callbacks:
+        for sample in data:
+            for value in sample.Samples:
+                buffer.put(value)
+        if buffer.qsize() > BUF_SIZE:
+            raw_data = [buffer.get() for _ in range(BUF_SIZE)]
+
+
+def run_ring_buffer(callbacks):
+    buffer = SignalRingBuffer(BUF_SIZE * 50)
+    for data in callbacks:
+        buffer.extend(np.fromiter(chain.from_iterable(sample.Samples for sample in data), dtype=np.float64))
+        while (raw_data := buffer.read(BUF_SIZE)) is not None:
+            pass
+
+
+if __name__ == '__main__':
+    callbacks = make_callbacks()
+    total_samples = len(callbacks) * PACKET_SIZE * PACKETS_PER_CALLBACK
+    for name, run in (("queue.Queue", run_queue), ("SignalRingBuffer", run_ring_buffer)):
+        start = time.perf_counter()
+        run(callbacks)
+        elapsed = time.perf_counter() - start
+        print("{}: {:.0f} samples/sec ({:.3f} sec for {} samples)".format(name, total_samples / elapsed,
+                                                                          elapsed, total_samples))
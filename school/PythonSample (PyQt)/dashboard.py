@@ -0,0 +1,158 @@
+from typing import List
+
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex
+from PyQt6.QtWidgets import QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QTableView, QHeaderView
+
+from callibri_controller import CallibriController, CallibriInfo, ConnectionState
+
+
+class DeviceTableModel(QAbstractTableModel):
+    COLUMNS = ['Адрес', 'Состояние', 'Батарея', 'ЧСС', 'RR-пики', 'Качество']
+    RESULT_COLUMNS = {'hr': 3, 'has_rr_picks': 4, 'quality': 5}
+
+    def __init__(self, controller: CallibriController, parent=None):
+        super().__init__(parent)
+        self.__addresses = []
+        self.__rows = {}
+        self.__values = {}
+        controller.connectionStateChanged.connect(self.__connection_state_changed)
+        controller.batteryChanged.connect(self.__battery_changed)
+        controller.resultsUpdated.connect(self.__results_updated)
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.__addresses)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.COLUMNS[section]
+        return None
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole or not index.isValid():
+            return None
+        value = self.__values[self.__addresses[index.row()]][index.column()]
+        if value is None:
+            return ""
+        column = index.column()
+        if column == 1:
+            return value.name
+        if column == 2:
+            return "{}%".format(value)
+        if column == 3:
+            return "%.2f" % value
+        if column == 4:
+            return "Есть" if value else "Нет"
+        if column == 5:
+            return "%.2f" % min(channel.score for channel in value)
+        return value
+
+    def __add_row(self, address: str):
+        row = len(self.__addresses)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.__addresses.append(address)
+        self.__rows[address] = row
+        self.__values[address] = [address] + [None] * (len(self.COLUMNS) - 1)
+        self.endInsertRows()
+
+    def __remove_row(self, address: str):
+        row = self.__rows.pop(address)
+        self.beginRemoveRows(QModelIndex(), row, row)
+        self.__addresses.pop(row)
+        self.__values.pop(address)
+        for index in range(row, len(self.__addresses)):
+            self.__rows[self.__addresses[index]] = index
+        self.endRemoveRows()
+
+    def __set_value(self, address: str, column: int, value):
+        self.__values[address][column] = value
+        index = self.index(self.__rows[address], column)
+        self.dataChanged.emit(index, index, [Qt.ItemDataRole.DisplayRole])
+
+    def __connection_state_changed(self, address: str, state: ConnectionState):
+        if state == ConnectionState.Disconnection:
+            if address in self.__rows:
+                self.__remove_row(address)
+            return
+        if address not in self.__rows:
+            self.__add_row(address)
+        self.__set_value(address, 1, state)
+
+    def __battery_changed(self, address: str, battery: int):
+        if address in self.__rows:
+            self.__set_value(address, 2, battery)
+
+    def __results_updated(self, updates: dict):
+        rows = []
+        columns = []
+        for address, values in updates.items():
+            row = self.__rows.get(address)
+            if row is None:
+                continue
+            for name, value in values.items():
+                column = self.RESULT_COLUMNS.get(name)
+                if column is None:
+                    continue
+                self.__values[address][column] = value
+                columns.append(column)
+            rows.append(row)
+        if columns:
+            self.dataChanged.emit(self.index(min(rows), min(columns)), self.index(max(rows), max(columns)),
+                                  [Qt.ItemDataRole.DisplayRole])
+
+
+class DashboardScreen(QMainWindow):
+    def __init__(self, controller: CallibriController, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.__controller = controller
+        self.setWindowTitle("Callibri")
+        self.resize(640, 480)
+        self.searchButton = QPushButton("Найти и подключить")
+        self.startCalcButton = QPushButton("Начать вычисления")
+        self.stopCalcButton = QPushButton("Остановить вычисления")
+        self.tableView = QTableView()
+        self.model = DeviceTableModel(controller, self)
+        self.tableView.setModel(self.model)
+        self.tableView.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        self.tableView.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+
+        buttons = QHBoxLayout()
+        buttons.addWidget(self.searchButton)
+        buttons.addWidget(self.startCalcButton)
+        buttons.addWidget(self.stopCalcButton)
+        layout = QVBoxLayout()
+        layout.addLayout(buttons)
+        layout.addWidget(self.tableView)
+        central = QWidget()
+        central.setLayout(layout)
+        self.setCentralWidget(central)
+
+        self.searchButton.clicked.connect(self.search_and_connect)
+        self.startCalcButton.clicked.connect(self.start_calc)
+        self.stopCalcButton.clicked.connect(self.stop_calc)
+        self.__controller.enable_coalescing(10)
+
+    def search_and_connect(self):
+        self.searchButton.setText("Поиск...")
+        self.searchButton.setEnabled(False)
+
+        def on_devices_founded(sensors: List[CallibriInfo]):
+            self.__controller.foundedDevices.disconnect(on_devices_founded)
+            self.__controller.connect_many(sensors, need_reconnect=True)
+            self.searchButton.setText("Найти и подключить")
+            self.searchButton.setEnabled(True)
+
+        self.__controller.foundedDevices.connect(on_devices_founded)
+        self.__controller.search_with_result(5, [])
+
+    def start_calc(self):
+        self.__controller.start_calculations_many(list(self.__controller.connected_devices), use_worker=True)
+
+    def stop_calc(self):
+        for address in list(self.__controller.connected_devices):
+            try:
+                self.__controller.stop_calculations(address)
+            except Exception as err:
+                print(err)
@@ -3,7 +3,8 @@ import sys
 from PyQt6.QtWidgets import QApplication, QMainWindow
 from PyQt6.uic import loadUi
 
-from callibri_controller import callibri_controller, ConnectionState, CallibriInfo
+from callibri_controller import ConnectionState, CallibriInfo
+from dashboard import DashboardScreen
 
 
 class MainScreen(QMainWindow):
@@ -22,6 +23,7 @@ class MainScreen(QMainWindow):
         self.stopCalcButton.clicked.connect(self.stop_calc)
         self.foundedListWidget.itemClicked.connect(self.connect_to_device)
         self.__founded_sensors=list[CallibriInfo]
+        callibri_controller.enable_coalescing(10)
 
     def start_search(self):
         self.foundedListWidget.clear()
@@ -57,31 +59,29 @@ class MainScreen(QMainWindow):
 
     def start_calc(self):
         current_device=callibri_controller.connected_devices[0]
-        def hr_values_updated(address: str, hr: float):
-            if address == current_device:
-                self.hrValue.setText("%.2f" % hr)
+        def results_updated(updates: dict):
+            values = updates.get(current_device, {})
+            if 'hr' in values:
+                self.hrValue.setText("%.2f" % values['hr'])
+            if 'has_rr_picks' in values:
+                self.hasRR.setText("Есть" if values['has_rr_picks'] else "Нет")
 
 
-        def has_rr_picks(address: str, has_picks: bool):
-            if address == current_device:
-                self.hasRR.setText("Есть" if has_picks else "Нет")
-
-
-        callibri_controller.hrValuesUpdated.connect(hr_values_updated)
-        callibri_controller.hasRRPicks.connect(has_rr_picks)
+        callibri_controller.resultsUpdated.connect(results_updated)
         callibri_controller.start_calculations(current_device)
 
     def stop_calc(self):
         try:
-            callibri_controller.hrValuesUpdated.disconnect()
-            callibri_controller.hasRRPicks.disconnect()
+            callibri_controller.resultsUpdated.disconnect()
         except Exception as err:
             print(err)
         callibri_controller.stop_calculations(callibri_controller.connected_devices[0])
 
-app = QApplication(sys.argv)
-window = MainScreen()
-window.show()
-app.exec()
-callibri_controller.stop_all()
-sys.exit()
\ No newline at end of file
+if __name__ == '__main__':
+    from callibri_controller import callibri_controller
+    app = QApplication(sys.argv)
+    window = DashboardScreen(callibri_controller) if '--dashboard' in sys.argv else MainScreen()
+    window.show()
+    app.exec()
+    callibri_controller.stop_all()
+    sys.exit()
\ No newline at end of file
@@ -0,0 +1,93 @@
+import argparse
+import sys
+import time
+from collections import Counter
+from threading import Event, Lock
+
+import common_path
+from brainbit_emotions_console_demo import BrainBitController
+from sensor_simulator import SimulatedScanner, EEG
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="BrainBit controller load test on simulated sensors")
+    parser.add_argument("--devices", type=int, default=50)
+    parser.add_argument("--seconds", type=int, default=30)
+    parser.add_argument("--mode", choices=["direct", "worker", "batch"], default="direct")
+    parser.add_argument("--max-parallel", type=int, default=8)
+    parser.add_argument("--reconnect-workers", type=int, default=8)
+    parser.add_argument("--disconnect-rate", type=float, default=0.0)
+    parser.add_argument("--artifact-rate", type=float, default=0.0)
+    parser.add_argument("--batch-delivery", action="store_true")
+    args = parser.parse_args()
+
+    scanner = SimulatedScanner(args.devices, EEG, disconnect_rate=args.disconnect_rate,
+                               artifact_rate=args.artifact_rate, seed=1)
+    controller = BrainBitController(scanner, reconnect_workers=args.reconnect_workers)
+    if args.mode == "batch":
+        controller.enable_batch_processing()
+
+    founded_sensors = list()
+    is_scan_ended = Event()
+
+    def on_device_founded(sensors):
+        founded_sensors.extend(sensors)
+        is_scan_ended.set()
+
+    controller.founded = on_device_founded
+    controller.search_with_result(1, [])
+    is_scan_ended.wait()
+
+    lock = Lock()
+    events = Counter()
+
+    def on_connection_state_changed(address, state):
+        with lock:
+            events[state.name] += 1
+
+    def on_artefacted(address, artefacted):
+        with lock:
+            events['windows'] += 1
+            if artefacted:
+                events['artefacted'] += 1
+
+    def on_mind_data_updated(address, mind_data):
+        with lock:
+            events['mind_data'] += 1
+
+    controller.connectionStateChanged = on_connection_state_changed
+    controller.isArtefacted = on_artefacted
+    def on_mind_data_batch(records):
+        with lock:
+            events['mind_data'] += len(records)
+
+    controller.mindDataUpdated = on_mind_data_updated
+    controller.mindDataBatch = on_mind_data_batch
+    if args.batch_delivery:
+        controller.enable_batch_delivery()
+
+    report = controller.connect_many(founded_sensors, need_reconnect=True, max_parallel=args.max_parallel).result()
+    print("Connected {} devices in {:.2f} sec, failed: {}".format(report.connected, report.seconds, report.failed))
+
+    controller.start_calculations_many(controller.connected_devices, use_worker=args.mode == "worker")
+    time.sleep(args.seconds)
+
+    print("Processed callbacks: {} ({:.0f}/sec)".format(events['windows'], events['windows'] / args.seconds))
+    print("Mind data updates: {}, events: {}".format(events['mind_data'], dict(events)))
+    if args.mode == "worker":
+        dropped = sum(controller.pipeline_stats(address)['dropped'] for address in controller.connected_devices)
+        print("Dropped packets: {}".format(dropped))
+    if args.mode == "batch":
+        print(controller.scheduler_stats())
+    if args.disconnect_rate > 0:
+        recover = [stages['recover']['max'] for stages in controller.stats().values() if 'recover' in stages]
+        print("Reconnects: {}, worst time to recover: {:.2f} sec".format(
+            controller.reconnect_stats()['recovered'], max(recover, default=0.0)))
+    totals = [stages['total'] for stages in controller.stats().values() if 'total' in stages]
+    if totals:
+        print("Latency p50/p99/max: {:.2f}/{:.2f}/{:.2f} ms".format(
+            1000 * sorted(total['p50'] for total in totals)[len(totals) // 2],
+            1000 * max(total['p99'] for total in totals),
+            1000 * max(total['max'] for total in totals)))
+    controller.stop_all()
+    scanner.shutdown()
+    sys.exit(0 if report.connected > 0 and events['windows'] > 0 else 1)
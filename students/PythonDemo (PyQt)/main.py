@@ -2,7 +2,8 @@ import sys
 
 from PyQt6.QtWidgets import QApplication, QMainWindow, QStackedWidget, QWidget
 from PyQt6.uic import loadUi
-from brain_bit_controller import brain_bit_controller, BrainBitInfo, ConnectionState, ResistValues, MindDataReal
+from brain_bit_controller import BrainBitInfo, ConnectionState, ResistValues, MindDataReal
+from dashboard import DashboardScreen
 
 
 class MainScreen(QMainWindow):
@@ -36,6 +37,7 @@ class MainScreen(QMainWindow):
         self.stopCalcButton.clicked.connect(self.stop_calc)
         self.listWidget.itemClicked.connect(self.connect_to_device)
         self.__founded_sensors=list[BrainBitInfo]
+        brain_bit_controller.enable_coalescing(10)
 
     def start_search(self):
         self.listWidget.clear()
@@ -110,36 +112,32 @@ class MainScreen(QMainWindow):
 
     def start_calc(self):
         current_bb = brain_bit_controller.connected_devices[0]
-        def is_artefacted(address: str, artefacted: bool):
-            if address == current_bb:
-                self.artefactLabel.setText("Есть" if artefacted else "Нет")
-
-        def calibration_progress_changed(address: str, progress: int):
-            if address == current_bb:
-                self.calibrationProgress.setValue(progress)
-
-        def mind_data_changed(address: str, mind_data: MindDataReal):
-            if address == current_bb:
+        def results_updated(updates: dict):
+            values = updates.get(current_bb, {})
+            if 'artefacted' in values:
+                self.artefactLabel.setText("Есть" if values['artefacted'] else "Нет")
+            if 'calibration' in values:
+                self.calibrationProgress.setValue(values['calibration'])
+            if 'mind_data' in values:
+                mind_data: MindDataReal = values['mind_data']
                 self.relaxLabel.setText("{}".format(mind_data.relaxation))
                 self.attentionLabel.setText("{}".format(mind_data.attention))
 
-        brain_bit_controller.isArtefacted.connect(is_artefacted)
-        brain_bit_controller.calibrationProcessChanged.connect(calibration_progress_changed)
-        brain_bit_controller.mindDataUpdated.connect(mind_data_changed)
+        brain_bit_controller.resultsUpdated.connect(results_updated)
         brain_bit_controller.start_calculations(current_bb)
 
     def stop_calc(self):
         try:
-            brain_bit_controller.isArtefacted.disconnect()
-            brain_bit_controller.calibrationProcessChanged.disconnect()
-            brain_bit_controller.mindDataUpdated.disconnect()
+            brain_bit_controller.resultsUpdated.disconnect()
         except Exception as err:
             print(err)
         brain_bit_controller.stop_calculations(brain_bit_controller.connected_devices[0])
 
-app = QApplication(sys.argv)
-window = MainScreen()
-window.show()
-app.exec()
-brain_bit_controller.stop_all()
-sys.exit()
\ No newline at end of file
+if __name__ == '__main__':
+    from brain_bit_controller import brain_bit_controller
+    app = QApplication(sys.argv)
+    window = DashboardScreen(brain_bit_controller) if '--dashboard' in sys.argv else MainScreen()
+    window.show()
+    app.exec()
+    brain_bit_controller.stop_all()
+    sys.exit()
\ No newline at end of file